@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+import logging
+from handle_db_connections import create_conn, execute_select
+from catalog_columns import ColumnarCatalog
+
+logger = logging.getLogger(__name__)
+
+# How long a snapshot may be served before it is reloaded unconditionally.
+CATALOG_TTL_SECONDS = int(os.getenv('CATALOG_TTL_SECONDS', 900))
+# How often the scraper's catalog version is polled between full reloads.
+CATALOG_VERSION_CHECK_SECONDS = int(os.getenv('CATALOG_VERSION_CHECK_SECONDS', 30))
+
+# offer_count and max_price are set on the rows that are their disc's cheapest offer.
+CATALOG_QUERY = """
+SELECT p.*, d.offer_count, d.max_price FROM main_schema.product_table p
+LEFT JOIN main_schema.disc_offers d ON d.cheapest_id = p.unique_id
+WHERE p.missing_since IS NULL
+  AND p.speed IS NOT NULL AND p.glide IS NOT NULL AND p.turn IS NOT NULL AND p.fade IS NOT NULL;
+"""
+VERSION_QUERY = "SELECT version FROM main_schema.catalog_meta WHERE id = 1"
+
+_lock = threading.Lock()
+_state = {
+    'catalog': None,
+    'version': None,
+    'loaded_at': 0.0,
+    'version_checked_at': 0.0,
+}
+# The version on its own, for callers that do not need the snapshot (see catalog_version).
+_version_lock = threading.Lock()
+_version_state = {
+    'version': None,
+    'checked_at': float('-inf'),
+}
+
+def process_product(product):
+    if product.get('speed') is not None:
+        product['speed'] = float(product['speed'])
+        product['glide'] = float(product['glide'])
+        product['turn'] = float(product['turn'])
+        product['fade'] = float(product['fade'])
+    return product
+
+def _fetch_version(connection):
+    try:
+        rows = execute_select(connection, VERSION_QUERY)
+    except Exception as e:
+        # Older schemas have no catalog_meta table, fall back to TTL-only refreshes.
+        logger.warning(f"Catalog version lookup failed: {e}")
+        return None
+    return rows[0].get('version') if rows else None
+
+def _load(connection):
+    version = _fetch_version(connection)
+    rows = execute_select(connection, CATALOG_QUERY)
+    products = [product for product in rows if "karte" not in product.get("title", "").lower()]
+    catalog = ColumnarCatalog(products)
+    now = time.monotonic()
+    _state['catalog'] = catalog
+    _state['version'] = version
+    _state['loaded_at'] = now
+    _state['version_checked_at'] = now
+    logger.info(f"Catalog snapshot loaded: {len(products)} products, version {version}")
+
+def _needs_check():
+    now = time.monotonic()
+    return (_state['catalog'] is None
+            or now - _state['loaded_at'] >= CATALOG_TTL_SECONDS
+            or now - _state['version_checked_at'] >= CATALOG_VERSION_CHECK_SECONDS)
+
+def _is_stale(connection):
+    now = time.monotonic()
+    if _state['catalog'] is None or now - _state['loaded_at'] >= CATALOG_TTL_SECONDS:
+        return True
+    _state['version_checked_at'] = now
+    version = _fetch_version(connection)
+    return version is not None and version != _state['version']
+
+def get_catalog():
+    """Return the shared ColumnarCatalog snapshot, refreshing it when stale."""
+    if not _needs_check():
+        return _state['catalog']
+
+    with _lock:
+        # Another thread may have refreshed the snapshot while we waited for the lock.
+        if _needs_check():
+            connection = None
+            try:
+                connection = create_conn()
+                if _is_stale(connection):
+                    _load(connection)
+            except Exception as e:
+                logger.error(f"Catalog refresh error: {e}")
+                if _state['catalog'] is None:
+                    raise
+                # Keep serving the old snapshot and retry after the next check interval.
+                now = time.monotonic()
+                _state['loaded_at'] = now - CATALOG_TTL_SECONDS + CATALOG_VERSION_CHECK_SECONDS
+                _state['version_checked_at'] = now
+            finally:
+                if connection:
+                    connection.close()
+        return _state['catalog']
+
+def current_version():
+    return _state['version']
+
+def catalog_version():
+    """The scraper's catalog version, re-read at most every CATALOG_VERSION_CHECK_SECONDS.
+
+    None when it is not known (yet), e.g. while another thread is reading it for the first time.
+    """
+    if time.monotonic() - _version_state['checked_at'] < CATALOG_VERSION_CHECK_SECONDS:
+        return _version_state['version']
+    # One thread re-reads it; the others answer with the value they have meanwhile.
+    if not _version_lock.acquire(blocking=False):
+        return _version_state['version']
+    connection = None
+    try:
+        connection = create_conn()
+        _version_state['version'] = _fetch_version(connection)
+    except Exception as e:
+        # Keep the last known version and retry after the next check interval.
+        logger.error(f"Catalog version check error: {e}")
+    finally:
+        if connection:
+            connection.close()
+        _version_state['checked_at'] = time.monotonic()
+        _version_lock.release()
+    return _version_state['version']
+
+def invalidate_catalog():
+    with _lock:
+        _state['loaded_at'] = 0.0
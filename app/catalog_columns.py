@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+import numpy as np
+
+from product_query import group_offers, parse_bound
+from title_index import TitleIndex
+
+FLIGHT_COLUMNS = ('speed', 'glide', 'turn', 'fade')
+NUMERIC_COLUMNS = ('price',) + FLIGHT_COLUMNS
+
+class ColumnarCatalog:
+    """Column-oriented snapshot of the products the grid can show.
+
+    Prices and flight numbers are float64 arrays, the store column is dictionary-encoded and titles
+    are indexed for search (title_index.py), so filters and sorts are array operations. Rows are
+    turned back into dicts only for the page being rendered. Instances are immutable once built.
+    """
+
+    def __init__(self, products):
+        self.size = len(products)
+        self.unique_id = [product['unique_id'] for product in products]
+        self.title = [product['title'] for product in products]
+        self.currency = [product['currency'] for product in products]
+        self.link_to_disc = [product['link_to_disc'] for product in products]
+        self.image_url = [product['image_url'] for product in products]
+        self.max_price = [product.get('max_price') for product in products]
+        # Offers of the row's disc when it is the disc's cheapest offer, else 0 (see disc_offers).
+        self.offer_count = np.array([product.get('offer_count') or 0 for product in products], dtype=np.int32)
+        self.title_lower = np.array([title.lower() for title in self.title], dtype=str)
+        self.columns = {
+            column: np.array([float(product[column]) for product in products], dtype=np.float64)
+            for column in NUMERIC_COLUMNS
+        }
+
+        # Store names sorted the way the "store" sort orders them, so a code's value is its rank.
+        self.store_names = sorted(set(product['store'] for product in products), key=str.lower)
+        self._store_codes = {store: code for code, store in enumerate(self.store_names)}
+        self.store_code = np.array([self._store_codes[product['store']] for product in products], dtype=np.int16)
+        self.stores = set(self.store_names)
+
+        # Rank of every row by lowercase title, so a title sort is an integer argsort.
+        self.title_rank = np.empty(self.size, dtype=np.int32)
+        self.title_rank[np.argsort(self.title_lower, kind='stable')] = np.arange(self.size, dtype=np.int32)
+
+        self.title_index = TitleIndex(self.title)
+
+    def select(self, args):
+        """Row indices matching the grid's search, range and store filters, in catalog order.
+
+        Unless every offer is asked for, only the cheapest offer of each disc is selected.
+
+        Also returns the search relevance of every row, or None when there is no search.
+        """
+        mask = self.offer_count > 0 if group_offers(args) else np.ones(self.size, dtype=bool)
+        relevance = None
+
+        query = args.get('search', '').lower()
+        if query:
+            relevance = self.title_index.scores(query)
+            if relevance is None:
+                # Nothing word-like to look up (e.g. only punctuation): plain substring match.
+                mask &= np.char.find(self.title_lower, query) >= 0
+            else:
+                mask &= relevance > 0
+
+        for column in NUMERIC_COLUMNS:
+            min_val = parse_bound(args, f'{column}_min')
+            if min_val is not None:
+                mask &= self.columns[column] >= min_val
+            max_val = parse_bound(args, f'{column}_max')
+            if max_val is not None:
+                mask &= self.columns[column] <= max_val
+
+        selected_stores = args.getlist('store')
+        if selected_stores:
+            codes = [self._store_codes[store] for store in selected_stores if store in self._store_codes]
+            mask &= np.isin(self.store_code, codes)
+
+        return np.flatnonzero(mask), relevance
+
+    def order(self, indices, sort_option, relevance=None):
+        """Sort row indices; equal keys keep catalog order, as the old sorted() calls did.
+
+        Without a recognised sort option, search results come best match first.
+        """
+        if sort_option == 'title':
+            keys = self.title_rank[indices]
+        elif sort_option == 'store':
+            keys = self.store_code[indices]
+        elif '_' in sort_option:
+            column, direction = sort_option.rsplit('_', 1)
+            if column not in self.columns or direction not in ('lowest', 'highest'):
+                return self._by_relevance(indices, relevance)
+            keys = self.columns[column][indices]
+            if direction == 'highest':
+                keys = -keys
+        else:
+            return self._by_relevance(indices, relevance)
+        return indices[np.argsort(keys, kind='stable')]
+
+    def _by_relevance(self, indices, relevance):
+        if relevance is None:
+            return indices
+        return indices[np.argsort(-relevance[indices], kind='stable')]
+
+    def row(self, index):
+        return {
+            'unique_id': self.unique_id[index],
+            'title': self.title[index],
+            # Rendered exactly like the DECIMAL(10, 2) the SQL path returns.
+            'price': Decimal(f"{self.columns['price'][index]:.2f}"),
+            'currency': self.currency[index],
+            'speed': float(self.columns['speed'][index]),
+            'glide': float(self.columns['glide'][index]),
+            'turn': float(self.columns['turn'][index]),
+            'fade': float(self.columns['fade'][index]),
+            'link_to_disc': self.link_to_disc[index],
+            'image_url': self.image_url[index],
+            'store': self.store_names[self.store_code[index]],
+            'offer_count': int(self.offer_count[index]),
+            'max_price': self.max_price[index],
+        }
+
+    def page(self, args, page, per_page):
+        """Return (products, total_count, stores) for one grid page, like product_query.fetch_product_page."""
+        indices, relevance = self.select(args)
+        indices = self.order(indices, args.get('sort', ''), relevance)
+        start = (max(page, 1) - 1) * per_page
+        return [self.row(index) for index in indices[start:start + per_page]], len(indices), self.stores
@@ -0,0 +1,112 @@
+"""EXPLAIN the grid, wishlist and recommender queries and flag the ones that do not use an index.
+
+    python explain_check.py
+
+Exits with status 1 when a query scans any table without an index (product_table, or disc_offers
+in the grouped grid) or sorts a LIMIT page of it with a filesort or temporary table, so it can run
+after migrate.py in a deploy step. The optimizer happily scans tiny
+tables, so run it against a database with a realistic catalog.
+"""
+import sys
+
+from werkzeug.datastructures import MultiDict
+
+from handle_db_connections import create_conn
+from product_query import API_FIELDS, build_disc_query, build_keyset_query, build_product_query
+import wishlist
+
+SAMPLE_ID = "0" * 64
+
+# Grid requests as the filter form sends them.
+GRID_CASES = {
+    "grid default": {},
+    "grid price lowest": {"sort": "price_lowest"},
+    "grid price highest": {"sort": "price_highest"},
+    "grid speed highest": {"sort": "speed_highest"},
+    "grid title": {"sort": "title"},
+    "grid one store by price": {"store": "par3.lv", "sort": "price_lowest"},
+    "grid price range": {"price_min": "10", "price_max": "20", "sort": "price_lowest"},
+    "grid search": {"search": "destr"},
+    "grid search by price": {"search": "star destroyer", "sort": "price_lowest"},
+}
+
+# The default one-row-per-disc grid (disc_offers joined to each disc's cheapest offer).
+DISC_CASES = {
+    "discs default": {},
+    "discs price lowest": {"sort": "price_lowest"},
+    "discs speed highest": {"sort": "speed_highest"},
+    "discs search": {"search": "buzz"},
+}
+
+# Copies of the recommender service's queries (recommender_service/recommender.py).
+RECOMMENDER_CASES = {
+    "recommender popular": ("""
+    SELECT p.unique_id, p.title, p.price
+    FROM (
+        SELECT unique_id, wishlist_count
+        FROM product_popularity
+        WHERE wishlist_count > 0
+        ORDER BY wishlist_count DESC
+        LIMIT 10
+    ) pp
+    JOIN product_table p ON p.unique_id = pp.unique_id
+    WHERE p.missing_since IS NULL
+    ORDER BY pp.wishlist_count DESC, p.price ASC
+    """, ()),
+    "recommender user wishlist": ("SELECT unique_id FROM wishlist WHERE user_id = %s", ("user",)),
+    "recommender product": ("SELECT unique_id, title FROM product_table WHERE unique_id = %s AND missing_since IS NULL",
+                            (SAMPLE_ID,)),
+}
+
+def query_cases():
+    cases = {}
+    for name, args in GRID_CASES.items():
+        cases[name] = build_product_query(MultiDict(args), 1, 12)
+    for name, args in DISC_CASES.items():
+        cases[name] = build_disc_query(MultiDict(args), 1, 12)
+    # /api/products continuing after a cursor.
+    cases["api price lowest after cursor"] = build_keyset_query(
+        MultiDict({"sort": "price_lowest", "all_offers": "1"}), ("10.00", SAMPLE_ID), 26, API_FIELDS)
+    cases["api discs speed after cursor"] = build_keyset_query(
+        MultiDict({"sort": "speed_highest"}), ("12.0", SAMPLE_ID), 26, API_FIELDS)
+    cases["wishlist products"] = (wishlist.PRODUCTS_QUERY, ("user",))
+    cases.update(RECOMMENDER_CASES)
+    return cases
+
+def problems(plan, sql_query):
+    """Reasons a plan is not acceptable."""
+    found = []
+    for row in plan:
+        table = row.get('table') or ''
+        # Derived tables are the already LIMITed result of a subquery; scanning and sorting them is cheap.
+        if table.startswith('<'):
+            continue
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            found.append(f"full scan of {table}")
+        # Sorting the rows a fulltext search matched is fine; they are few.
+        if 'LIMIT' in sql_query.upper() and row.get('type') != 'fulltext':
+            if 'Using filesort' in extra:
+                found.append(f"filesort on {table}")
+            if 'Using temporary' in extra:
+                found.append(f"temporary table for {table}")
+    return found
+
+def main():
+    failed = 0
+    connection = create_conn()
+    try:
+        for name, (sql_query, params) in query_cases().items():
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {sql_query}", tuple(params))
+                plan = cursor.fetchall()
+            keys = ', '.join(f"{row.get('table')}:{row.get('key') or '-'}" for row in plan)
+            issues = problems(plan, sql_query)
+            print(f"{'FAIL' if issues else 'ok':<5} {name:<28} {keys}" + (f"  ({'; '.join(issues)})" if issues else ''))
+            failed += bool(issues)
+    finally:
+        connection.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,71 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from google.cloud import secretmanager
 from google.api_core.exceptions import  PermissionDenied
 
-def get_secret(secret_name):
+# Seconds a fetched secret is served from memory before Secret Manager is asked again.
+SECRET_CACHE_TTL = float(os.getenv('SECRET_CACHE_TTL', 3600))
+
+_cache = {}  # secret_name -> (value, fetched_at)
+_lock = threading.Lock()
+_client = None
+_dotenv_loaded = False
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = secretmanager.SecretManagerServiceClient()
+    return _client
+
+def _fetch_secret(secret_name):
+    global _dotenv_loaded
     app_env = os.getenv('APP_ENV', 'local').lower()
-    
+
     if app_env == 'local':
-        load_dotenv()
+        if not _dotenv_loaded:
+            load_dotenv()
+            _dotenv_loaded = True
         value = os.getenv(secret_name)
         if not value:
             raise ValueError(f"Local secret {secret_name} not found in .env")
         return value
-        
+
     elif app_env == 'prod':
-        client = secretmanager.SecretManagerServiceClient()
+        client = _get_client()
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
-        
+
         if not project_id:
             raise ValueError("GOOGLE_CLOUD_PROJECT environment variable not set")
-            
+
         secret_path = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
         response = client.access_secret_version(name=secret_path)
-        return response.payload.data.decode('UTF-8')
\ No newline at end of file
+        return response.payload.data.decode('UTF-8')
+
+def get_secret(secret_name):
+    cached = _cache.get(secret_name)
+    if cached is not None and time.monotonic() - cached[1] < SECRET_CACHE_TTL:
+        return cached[0]
+
+    value = _fetch_secret(secret_name)
+    if value is not None:
+        with _lock:
+            _cache[secret_name] = (value, time.monotonic())
+    return value
+
+def prefetch_secrets(secret_names):
+    for secret_name in secret_names:
+        get_secret(secret_name)
+
+def invalidate_secret(secret_name=None):
+    """Drop one cached secret, or all of them, so the next lookup sees a rotated value."""
+    global _dotenv_loaded
+    with _lock:
+        if secret_name is None:
+            _cache.clear()
+            _dotenv_loaded = False
+        else:
+            _cache.pop(secret_name, None)
@@ -1,9 +1,24 @@
+import os
 import pymysql
 import decimal
+import threading
 import time
-from handle_credentials import get_secret
+from collections import deque
+from contextlib import contextmanager
+from handle_credentials import get_secret, invalidate_secret
 
-def create_conn():
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 1800))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 10))
+# Idle connections older than this are pinged before being handed out again.
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30))
+
+DB_SECRET_NAMES = ("connection_socket", "connection_user", "connection_password", "connection_database")
+
+class PoolTimeoutError(Exception):
+    pass
+
+def _connect():
     for attempt in range(3):
         try:
             connection_socket = get_secret("connection_socket")
@@ -23,9 +38,133 @@ def create_conn():
         except pymysql.err.OperationalError as e:
             if attempt == 2:
                 raise
-            time.sleep(1)  # Wait before retrying
+            # The credentials may have been rotated since they were cached.
+            for secret_name in DB_SECRET_NAMES:
+                invalidate_secret(secret_name)
+            time.sleep(0.2 * 2 ** attempt)  # Back off before retrying
+
+class PooledConnection:
+    """Wraps a pymysql connection so that close() returns it to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool.release(raw, self._created_at)
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise pymysql.err.InterfaceError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+class ConnectionPool:
+    def __init__(self, connect, max_size, max_lifetime, checkout_timeout, health_check_interval):
+        self._connect = connect
+        self._max_size = max_size
+        self._max_lifetime = max_lifetime
+        self._checkout_timeout = checkout_timeout
+        self._health_check_interval = health_check_interval
+        self._idle = deque()  # (raw, created_at, last_used)
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self._checkout_timeout
+        while True:
+            candidate = None
+            with self._cond:
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._size < self._max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(f"No database connection available within {self._checkout_timeout}s")
+                    self._cond.wait(remaining)
+                    continue
+
+            if candidate:
+                raw, created_at, last_used = candidate
+                if self._is_healthy(raw, created_at, last_used):
+                    return PooledConnection(self, raw, created_at)
+                self._discard(raw)
+                continue
+
+            try:
+                raw = self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+            return PooledConnection(self, raw, time.monotonic())
+
+    def release(self, raw, created_at):
+        try:
+            # Ends any open transaction so the next borrower does not read an old snapshot.
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        if time.monotonic() - created_at >= self._max_lifetime:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _is_healthy(self, raw, created_at, last_used):
+        now = time.monotonic()
+        if now - created_at >= self._max_lifetime:
+            return False
+        if now - last_used >= self._health_check_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, raw):
+        if raw is not None:
+            try:
+                raw.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, POOL_SIZE, POOL_MAX_LIFETIME,
+                                       POOL_CHECKOUT_TIMEOUT, POOL_HEALTH_CHECK_INTERVAL)
+    return _pool
+
+def create_conn():
+    return get_pool().acquire()
+
+@contextmanager
+def pooled_connection():
+    connection = create_conn()
+    try:
+        yield connection
+    finally:
+        connection.close()
 
 def execute_insert(connection, query, statements):
+    if connection is None:
+        with pooled_connection() as connection:
+            return execute_insert(connection, query, statements)
     cursor = None
     try:
         cursor = connection.cursor()
@@ -41,6 +180,9 @@ def execute_insert(connection, query, statements):
             cursor.close()
 
 def execute_select(connection, query, params=None):
+    if connection is None:
+        with pooled_connection() as connection:
+            return execute_select(connection, query, params)
     cursor = None
     try:
         cursor = connection.cursor()
@@ -55,4 +197,4 @@ def execute_select(connection, query, params=None):
         raise
     finally:
         if cursor:
-            cursor.close()
\ No newline at end of file
+            cursor.close()
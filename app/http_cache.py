@@ -0,0 +1,66 @@
+import os
+from functools import wraps
+
+from flask import g, make_response, request, session
+
+# How long browsers and shared caches may reuse an anonymous catalog response without asking.
+CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', 60))
+# Cloud Run's revision name, so pages rendered by the previous deploy's templates are not revalidated.
+ETAG_SALT = os.getenv('K_REVISION', 'local')
+
+def logged_in():
+    return 'google_token' in session
+
+def do_not_cache():
+    """Keep the current response out of HTTP caches, e.g. a page rendered empty after a database error."""
+    g.no_http_cache = True
+
+def catalog_etag(version, variant=''):
+    return f"{ETAG_SALT}-{version}{'-' + variant if variant else ''}"
+
+def catalog_cached(get_version, per_session=False):
+    """Serve the view with a weak ETag built from the catalog version, answering matching
+    If-None-Match requests with a 304 before the view runs.
+
+    Catalog responses only change when the scraper publishes a new version. With per_session the
+    response also depends on whether the visitor is logged in: logged-in pages are private and
+    always revalidated, anonymous ones may be shared. Without a known version the view runs
+    uncached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = get_version()
+            if version is None:
+                return view(*args, **kwargs)
+
+            private = per_session and logged_in()
+            etag = catalog_etag(version, 'user' if private else '')
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or g.get('no_http_cache'):
+                    response.headers['Cache-Control'] = 'no-store'
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if private:
+                response.headers['Cache-Control'] = 'private, no-cache'
+            else:
+                response.headers['Cache-Control'] = f'public, max-age={CATALOG_MAX_AGE}'
+            if per_session:
+                response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
+
+def revalidated(response):
+    """Private, always revalidated response with an ETag of its body; unchanged bodies become 304s."""
+    response = make_response(response)
+    if response.status_code != 200:
+        return response
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    response.add_etag(weak=True)
+    return response.make_conditional(request)
@@ -3,8 +3,15 @@ import os
 import requests
 from flask import Flask, render_template, jsonify, request, session, redirect, url_for
 from flask_oauthlib.client import OAuth
-from handle_credentials import get_secret
-from handle_db_connections import create_conn, execute_insert, execute_select
+from handle_credentials import get_secret, prefetch_secrets
+from handle_db_connections import DB_SECRET_NAMES, create_conn, execute_insert
+from catalog_cache import catalog_version, current_version, get_catalog, process_product
+from http_cache import catalog_cached, do_not_cache, revalidated
+from result_cache import build_cache, canonical_key
+from recommendations import UNAVAILABLE, CircuitOpenError, RecommendationClient
+from product_query import QueryArgumentError, encode_cursor, fetch_keyset_page, fetch_product_page
+import price_history
+import wishlist
 import logging
 
 app = Flask(__name__)
@@ -13,10 +20,29 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+prefetch_secrets(("SECRET_KEY", "google_id", "google_secret", "recommender_url") + DB_SECRET_NAMES)
+
 app.secret_key = get_secret("SECRET_KEY")
 app.config['GOOGLE_ID'] = get_secret("google_id")
 app.config['GOOGLE_SECRET'] = get_secret("google_secret")
 app.config['RECOMMENDER_URL'] = get_secret("recommender_url")
+# "sql" pushes filtering and pagination into MySQL, "memory" serves them from the catalog snapshot.
+# Both match search terms anywhere in a title through an index; only "memory" also forgives typos
+# ("destoryer") and ranks unsorted results by relevance.
+app.config['PRODUCT_GRID_SOURCE'] = os.getenv('PRODUCT_GRID_SOURCE', 'sql').lower()
+# Largest page /api/products returns.
+app.config['API_MAX_LIMIT'] = int(os.getenv('API_MAX_LIMIT', 100))
+
+# Grid pages computed by any worker, keyed by their arguments and the catalog version.
+result_cache = build_cache()
+
+if os.getenv("APP_ENV") == "local":
+    recommender_url = "http://localhost:8080/recommend"
+else:
+    base = app.config["RECOMMENDER_URL"].rstrip("/")
+    recommender_url = base if base.endswith("/recommend") else f"{base}/recommend"
+# Fetched by the profile page after it has rendered, so a cold recommender never holds up the page.
+recommender = RecommendationClient(recommender_url)
 
 oauth = OAuth(app)
 google = oauth.remote_app(
@@ -87,31 +113,35 @@ def get_google_oauth_token():
 def home():
     return render_template('home.html')
 
+def grid_version():
+    # The memory source shows its snapshot, which can trail the published version by a check interval.
+    if app.config['PRODUCT_GRID_SOURCE'] == 'memory':
+        try:
+            get_catalog()
+        except Exception:
+            return None
+        return current_version()
+    return catalog_version()
+
 @app.route("/products")
+@catalog_cached(grid_version, per_session=True)
 def product_grid():
-    connection = None
+    page, per_page = int(request.args.get('page', 1)), 25
+
     try:
-        sql_query = """
-        SELECT * FROM main_schema.product_table 
-        WHERE speed IS NOT NULL AND glide IS NOT NULL AND turn IS NOT NULL AND fade IS NOT NULL;
-        """
-        connection = create_conn()
-        products = execute_select(connection, sql_query)
-        products = [process_product(product) for product in products if "karte" not in product.get("title", "").lower()]
+        paginated_products, total_products, unique_stores = cached_product_page(request.args, page, per_page)
     except Exception as e:
         logger.error(f"Product grid error: {e}")
-        products = []
-    finally:
-        if connection:
-            connection.close()
+        do_not_cache()
+        paginated_products, total_products, unique_stores = [], 0, set()
 
-    filtered_products = filter_products(products, request.args)
-    sorted_products = sort_products(filtered_products, request.args.get('sort', ''))
+    total_pages = (total_products + per_page - 1) // per_page
 
-    page, per_page = int(request.args.get('page', 1)), 25
-    paginated_products = paginate_products(sorted_products, page, per_page)
-
-    unique_stores = set(product['store'] for product in products)
+    # Lets the page continue from its last card through /api/products. The memory source breaks
+    # ties in a different order than the API's keyset, so it keeps plain page links only.
+    next_cursor = None
+    if app.config['PRODUCT_GRID_SOURCE'] != 'memory' and paginated_products and page < total_pages:
+        next_cursor = encode_cursor(request.args.get('sort', ''), paginated_products[-1])
 
     return render_template(
         'product_grid.html',
@@ -123,11 +153,13 @@ def product_grid():
         selected_turn=request.args.get('turn', ''),
         selected_fade=request.args.get('fade', ''),
         selected_stores=request.args.getlist('store'),
+        show_all_offers=bool(request.args.get('all_offers')),
         unique_stores=unique_stores,
         sort_option=request.args.get('sort', ''),
         page=page,
-        total_pages=(len(sorted_products) + per_page - 1) // per_page,
-        pages_to_display=range(page, min(page + 3, ((len(sorted_products) + per_page - 1) // per_page) + 1)),
+        total_pages=total_pages,
+        pages_to_display=range(page, min(page + 3, total_pages + 1)),
+        next_cursor=next_cursor,
         session=session
     )
 
@@ -141,10 +173,7 @@ def profile():
     
     try:
         connection = create_conn()
-        sql_query = "SELECT product_history FROM users WHERE id = %s"
-        user_json = execute_select(connection, sql_query, (session_id,))
-        product_history = json.loads(user_json[0].get("product_history")).get("product_history")
-        products = get_products_by_ids(connection, product_history)
+        products = wishlist.get_products(connection, session_id)
         products = [process_product(product) for product in products if "karte" not in product.get("title", "").lower()]
     except Exception as e:
         logger.error(f"Profile fetch error: {e}")
@@ -164,23 +193,10 @@ def profile():
         logger.error(f"Google userinfo error: {e}")
         user = {'email': 'Unknown', 'picture': ''}
 
-    # Get recommendation
-    if os.getenv("APP_ENV") == "local":
-        recommender_url = "http://localhost:8080/recommend"
-    else:
-        base = app.config["RECOMMENDER_URL"].rstrip("/")         
-        recommender_url = base if base.endswith("/recommend") \
-                            else f"{base}/recommend"            
+    # Only a recommendation that is already cached is rendered; otherwise the page asks
+    # /recommendation for one once it has loaded.
+    recommendation = recommender.cached(session_id)
 
-    try:
-        # give Cloud Run enough time for a cold-start
-        response = requests.get(f"{recommender_url}?user_id={session_id}", timeout=20)
-        response.raise_for_status()          # raise if HTTP 4xx/5xx
-        recommendation = response.json()
-    except requests.RequestException as e:
-        logger.error(f"Recommendation error: {e}")
-        recommendation = {"title": "Recommendation unavailable", "unique_id": None}
-        
     return render_template(
         'profile.html', 
         products=paginated_products,
@@ -188,30 +204,47 @@ def profile():
         total_pages=(len(products) + per_page - 1) // per_page,
         pages_to_display=range(page, min(page + 3, ((len(products) + per_page - 1) // per_page) + 1)),
         user=user,
-        recommendation=recommendation,
-        recommender_url=recommender_url
+        recommendation=recommendation
     )
 
+@app.route('/recommendation', methods=['GET'])
+def recommendation():
+    if "id" not in session:
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    try:
+        # fresh=1 skips the cache, e.g. right after the wishlist changed on another worker.
+        data = recommender.get(session.get('id'), fresh=request.args.get('fresh') == '1')
+    except CircuitOpenError:
+        return jsonify(UNAVAILABLE), 503
+    except requests.RequestException as e:
+        logger.error(f"Recommendation error: {e}")
+        return jsonify(UNAVAILABLE), 502
+
+    response = jsonify(data)
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
 @app.route('/add-to-wishlist', methods=['POST'])
 def add_to_wishlist():
+    if "id" not in session:
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
     connection = None
     try:
-        product_data = request.get_json()
+        product_data = request.get_json(silent=True) or {}
         session_id = session.get('id')
-
-        connection = create_conn()
-        sql_query = "SELECT product_history FROM users WHERE id = %s"
-        user_json = execute_select(connection, sql_query, (session_id,))
-        product_history = json.loads(user_json[0].get("product_history"))
-        
         unique_id = product_data.get("unique_id")
-        if unique_id not in product_history["product_history"]:
-            product_history["product_history"].append(unique_id)
+        if not unique_id or not isinstance(unique_id, str):
+            return jsonify({"success": False, "message": "Missing unique_id"}), 400
 
-        query = "UPDATE users SET product_history = %s WHERE id = %s"
-        execute_insert(connection, query, [(json.dumps(product_history), session_id)])
+        connection = create_conn()
+        wishlist.add_item(connection, session_id, unique_id)
+        recommender.forget(session_id)
 
         return jsonify({"success": True, "message": "Added to wishlist", "unique_id": unique_id})
+    except wishlist.UnknownProductError as e:
+        return jsonify({"success": False, "message": str(e)}), 404
     except Exception as e:
         logger.error(f"Add to wishlist error: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
@@ -221,22 +254,18 @@ def add_to_wishlist():
 
 @app.route('/remove-from-wishlist', methods=['POST'])
 def remove_from_wishlist():
+    if "id" not in session:
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
     connection = None
     try:
         product_data = request.get_json()
         session_id = session.get('id')
-
-        connection = create_conn()
-        sql_query = "SELECT product_history FROM users WHERE id = %s"
-        user_json = execute_select(connection, sql_query, (session_id,))
-        product_history = json.loads(user_json[0].get("product_history"))
-        
         unique_id = product_data.get("unique_id")
-        if unique_id in product_history["product_history"]:
-            product_history["product_history"].remove(unique_id)
 
-        query = "UPDATE users SET product_history = %s WHERE id = %s"
-        execute_insert(connection, query, [(json.dumps(product_history), session_id)])
+        connection = create_conn()
+        wishlist.remove_item(connection, session_id, unique_id)
+        recommender.forget(session_id)
 
         return jsonify({"success": True, "message": "Removed from wishlist", "unique_id": unique_id})
     except Exception as e:
@@ -255,12 +284,10 @@ def get_wishlist():
     connection = None
     try:
         connection = create_conn()
-        sql_query = "SELECT product_history FROM users WHERE id = %s"
-        user_json = execute_select(connection, sql_query, (session_id,))
-        product_history = json.loads(user_json[0].get("product_history")).get("product_history")
-        products = get_products_by_ids(connection, product_history)
+        products = wishlist.get_products(connection, session_id)
         products = [process_product(product) for product in products if "karte" not in product.get("title", "").lower()]
-        return jsonify({"success": True, "products": products})
+        # Wishlists change with the user's own clicks, not the catalog version, so the ETag is of the body.
+        return revalidated(jsonify({"success": True, "products": products}))
     except Exception as e:
         logger.error(f"Get wishlist error: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
@@ -268,76 +295,96 @@ def get_wishlist():
         if connection:
             connection.close()
 
+@app.route('/api/products', methods=['GET'])
+@catalog_cached(catalog_version)
+def api_products():
+    # Grid rows as JSON, paged with an opaque keyset cursor instead of page numbers. Takes the
+    # grid's filter arguments plus cursor, limit and fields (comma separated).
+    limit = min(max(request.args.get('limit', 25, type=int), 1), app.config['API_MAX_LIMIT'])
+    connection = None
+    try:
+        connection = create_conn()
+        products, next_cursor = fetch_keyset_page(
+            connection, request.args, request.args.get('cursor'), limit, request.args.get('fields'))
+    except QueryArgumentError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Product API error: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        if connection:
+            connection.close()
+    return jsonify({"success": True, "products": products, "next_cursor": next_cursor})
+
+@app.route('/api/products/<unique_id>/price-history', methods=['GET'])
+@catalog_cached(catalog_version)
+def product_price_history(unique_id):
+    return price_response(price_history.get_history, unique_id, request.args.get('days', 365, type=int))
+
+@app.route('/api/products/<unique_id>/lowest-price', methods=['GET'])
+@catalog_cached(catalog_version)
+def product_lowest_price(unique_id):
+    return price_response(price_history.get_lowest_price, unique_id, request.args.get('days', 90, type=int))
+
+@app.route('/metrics/cache', methods=['GET'])
+def cache_metrics():
+    # Counters of this worker process only; every gunicorn worker has its own.
+    response = jsonify(result_cache.metrics())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # Helper functions:
-def process_product(product):
-    if product.get('speed') is not None:
-        product['speed'] = float(product['speed'])
-        product['glide'] = float(product['glide'])
-        product['turn'] = float(product['turn'])
-        product['fade'] = float(product['fade'])
-    return product
-
-def filter_products(products, args):
-    filtered = products
-    query = args.get('search', '').lower()
-    if query:
-        filtered = [p for p in filtered if query in p['title'].lower()]
+def sql_product_page(args, page, per_page):
+    connection = None
     try:
-        min_price = float(args.get('price_min', 0))
-    except ValueError:
-        min_price = 0
+        connection = create_conn()
+        products, total, stores = fetch_product_page(connection, args, page, per_page, catalog_version())
+        return [process_product(product) for product in products], total, stores
+    finally:
+        if connection:
+            connection.close()
+
+def catalog_product_page(args, page, per_page):
+    return get_catalog().page(args, page, per_page)
+
+def cached_product_page(args, page, per_page):
+    """(products, total_count, stores) for a grid page, through the result cache.
+
+    Errors propagate and are never cached.
+    """
+    source = app.config['PRODUCT_GRID_SOURCE']
+    load = catalog_product_page if source == 'memory' else sql_product_page
+    version = grid_version()
+    if version is None:
+        return load(args, page, per_page)
+
+    def compute():
+        products, total, stores = load(args, page, per_page)
+        return {'products': products, 'total': total, 'stores': sorted(stores)}
+
+    key = canonical_key(f"grid:{source}:{page}", version, args, exclude=('page',))
+    result = result_cache.get_or_compute(key, compute)
+    return result['products'], result['total'], set(result['stores'])
+
+def price_response(lookup, unique_id, days):
+    connection = None
     try:
-        max_price = float(args.get('price_max', float('inf')))
-    except ValueError:
-        max_price = float('inf')
-    filtered = [p for p in filtered if min_price <= float(p['price']) <= max_price]
-    for attr in ['speed', 'glide', 'turn', 'fade']:
-        try:
-            min_val = float(args.get(f'{attr}_min', -float('inf')))
-        except ValueError:
-            min_val = -float('inf')
-        try:
-            max_val = float(args.get(f'{attr}_max', float('inf')))
-        except ValueError:
-            max_val = float('inf')
-        filtered = [p for p in filtered if min_val <= float(p.get(attr, 0)) <= max_val]
-    selected_stores = args.getlist('store')
-    if selected_stores:
-        filtered = [p for p in filtered if p['store'] in selected_stores]
-    return filtered
-
-def sort_products(products, sort_option):
-    if sort_option == 'price_lowest':
-        return sorted(products, key=lambda x: float(x['price']))
-    elif sort_option == 'price_highest':
-        return sorted(products, key=lambda x: float(x['price']), reverse=True)
-    elif sort_option == 'title':
-        return sorted(products, key=lambda x: x['title'].lower())
-    elif sort_option == 'store':
-        return sorted(products, key=lambda x: x['store'].lower())
-    elif sort_option in ['glide_lowest', 'glide_highest', 'speed_lowest', 'speed_highest', 
-                         'turn_lowest', 'turn_highest', 'fade_lowest', 'fade_highest']:
-        attribute, direction = sort_option.split('_')
-        return sorted(products, 
-                      key=lambda x: float(x.get(attribute, 0)), 
-                      reverse=(direction == 'highest'))
-    return products
+        connection = create_conn()
+        result = lookup(connection, unique_id, days)
+    except Exception as e:
+        logger.error(f"Price history error: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        if connection:
+            connection.close()
+    if result is None:
+        return jsonify({"success": False, "message": "Unknown product"}), 404
+    return jsonify({"success": True, **result})
 
 def paginate_products(products, page, per_page):
     start = (page - 1) * per_page
     end = start + per_page
     return products[start:end]
 
-def get_products_by_ids(connection, product_ids):
-    if not product_ids:
-        return []
-    placeholders = ', '.join(['%s'] * len(product_ids))
-    sql_query = f"""
-        SELECT *
-        FROM product_table
-        WHERE unique_id IN ({placeholders})
-    """
-    return execute_select(connection, sql_query, tuple(product_ids))
-
 if __name__ == "__main__":
     app.run(debug=False)
\ No newline at end of file
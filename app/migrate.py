@@ -0,0 +1,116 @@
+"""Apply the numbered SQL files in migrations/ that the database has not seen yet.
+
+    python migrate.py                 # apply pending migrations in order
+    python migrate.py --status        # list applied and pending migrations
+    python migrate.py --baseline 3    # record 001-003 as applied without running them
+
+A database created from tables.sql already has every migration recorded. One that predates this
+runner but had migrations applied by hand needs a --baseline first.
+"""
+import os
+import re
+import sys
+import argparse
+import logging
+
+from handle_db_connections import create_conn
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_.+\.sql$')
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS main_schema.schema_migrations (
+    version INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version)
+)
+"""
+RECORD = "INSERT INTO main_schema.schema_migrations (version, name) VALUES (%s, %s)"
+
+def available_migrations():
+    """[(version, filename)] of migrations/ in version order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), filename))
+    migrations.sort()
+    versions = [version for version, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration numbers in {MIGRATIONS_DIR}")
+    return migrations
+
+def split_statements(sql):
+    """Split a migration into statements. Migrations keep one statement per ';'-terminated block."""
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def applied_versions(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        cursor.execute("SELECT version FROM main_schema.schema_migrations")
+        return set(row['version'] for row in cursor.fetchall())
+
+def apply_migration(connection, version, filename):
+    with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+        statements = split_statements(f.read())
+    logger.info(f"Applying {filename} ({len(statements)} statements)")
+    try:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(RECORD, (version, filename))
+        connection.commit()
+    except Exception:
+        # MySQL commits DDL implicitly, so a failed migration can be half applied: fix the
+        # schema by hand, then re-run or --baseline past it.
+        connection.rollback()
+        logger.error(f"{filename} failed; statements before the failing one may already be applied")
+        raise
+
+def migrate(connection):
+    applied = applied_versions(connection)
+    pending = [(version, filename) for version, filename in available_migrations() if version not in applied]
+    if not pending:
+        logger.info("Schema is up to date")
+    for version, filename in pending:
+        apply_migration(connection, version, filename)
+    return len(pending)
+
+def baseline(connection, up_to):
+    applied = applied_versions(connection)
+    with connection.cursor() as cursor:
+        for version, filename in available_migrations():
+            if version <= up_to and version not in applied:
+                cursor.execute(RECORD, (version, filename))
+                logger.info(f"Marked {filename} as applied")
+    connection.commit()
+
+def status(connection):
+    applied = applied_versions(connection)
+    for version, filename in available_migrations():
+        print(f"{'applied' if version in applied else 'pending':<8} {filename}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--status', action='store_true')
+    parser.add_argument('--baseline', type=int, metavar='VERSION')
+    args = parser.parse_args()
+
+    connection = create_conn()
+    try:
+        if args.status:
+            status(connection)
+        elif args.baseline is not None:
+            baseline(connection, args.baseline)
+        else:
+            migrate(connection)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
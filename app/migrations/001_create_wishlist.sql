@@ -0,0 +1,16 @@
+USE main_schema;
+
+-- Moves wishlists out of the users.product_history JSON document into their own table.
+CREATE TABLE IF NOT EXISTS wishlist (
+    user_id VARCHAR(255) NOT NULL,
+    unique_id VARCHAR(256) NOT NULL,
+    added_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, unique_id),
+    KEY idx_wishlist_unique_id (unique_id)
+);
+
+INSERT IGNORE INTO wishlist (user_id, unique_id)
+SELECT u.id, jt.unique_id
+FROM users u,
+     JSON_TABLE(u.product_history, '$.product_history[*]' COLUMNS (unique_id VARCHAR(256) PATH '$')) AS jt
+WHERE jt.unique_id IS NOT NULL;
@@ -0,0 +1,17 @@
+USE main_schema;
+
+-- Wishlist counts per product, kept up to date by the app's wishlist writes.
+CREATE TABLE IF NOT EXISTS product_popularity (
+    unique_id VARCHAR(256) NOT NULL,
+    wishlist_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (unique_id),
+    KEY idx_popularity_count (wishlist_count)
+);
+
+-- Safe to re-run: rebuilds the counts from the wishlist table.
+INSERT INTO product_popularity (unique_id, wishlist_count)
+SELECT unique_id, COUNT(*) FROM wishlist GROUP BY unique_id
+ON DUPLICATE KEY UPDATE wishlist_count = VALUES(wishlist_count);
+
+DELETE FROM product_popularity
+WHERE unique_id NOT IN (SELECT unique_id FROM wishlist);
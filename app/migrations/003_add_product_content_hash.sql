@@ -0,0 +1,4 @@
+USE main_schema;
+
+-- Fingerprint of the scraped columns; the scraper skips rows whose fingerprint did not change.
+ALTER TABLE product_table ADD COLUMN content_hash CHAR(32) NULL;
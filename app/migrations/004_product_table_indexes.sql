@@ -0,0 +1,20 @@
+USE main_schema;
+
+-- unique_id is always a 64 character sha256 hex digest. As single-byte ascii_bin it is a quarter of
+-- the utf8mb4 VARCHAR(256) key width, and every secondary index carries a copy of it. The joined
+-- columns get the same type so the wishlist and popularity joins stay index lookups.
+ALTER TABLE product_table MODIFY unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL;
+ALTER TABLE wishlist MODIFY unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL;
+ALTER TABLE product_popularity MODIFY unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL;
+
+-- The grid sorts by one column with unique_id as tiebreaker in the same direction, then LIMITs.
+-- InnoDB appends the primary key to secondary indexes, so (price) serves ORDER BY price, unique_id
+-- forwards and backwards. (store, price) covers the common single-store filter sorted by price.
+ALTER TABLE product_table
+    ADD KEY idx_product_price (price),
+    ADD KEY idx_product_speed (speed),
+    ADD KEY idx_product_glide (glide),
+    ADD KEY idx_product_turn (turn),
+    ADD KEY idx_product_fade (fade),
+    ADD KEY idx_product_title (title),
+    ADD KEY idx_product_store_price (store, price);
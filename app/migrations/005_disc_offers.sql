@@ -0,0 +1,26 @@
+USE main_schema;
+
+-- Offers of the same disc (mold and plastic) in different stores share a canonical_id, assigned by
+-- the scraper's matching pass (batch_jobs/scraper_job/scrape_stores/matching.py).
+ALTER TABLE product_table
+    ADD COLUMN canonical_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NULL,
+    ADD KEY idx_product_canonical_price (canonical_id, price);
+
+-- One row per disc with its cheapest offer, rebuilt by the scraper after matching so the grid
+-- does not group offers per request.
+CREATE TABLE disc_offers (
+    canonical_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    cheapest_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    offer_count INT NOT NULL,
+    max_price DECIMAL(10, 2),
+    PRIMARY KEY (canonical_id),
+    UNIQUE KEY idx_disc_offers_cheapest (cheapest_id)
+);
+
+-- Until the next scrape matches them, every product is a disc of its own.
+UPDATE product_table SET canonical_id = unique_id;
+
+INSERT INTO disc_offers (canonical_id, cheapest_id, offer_count, max_price)
+SELECT unique_id, unique_id, 1, price FROM product_table
+WHERE speed IS NOT NULL AND glide IS NOT NULL AND turn IS NOT NULL AND fade IS NOT NULL
+  AND LOWER(title) NOT LIKE '%karte%';
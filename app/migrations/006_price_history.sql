@@ -0,0 +1,29 @@
+USE main_schema;
+
+-- One row per product each time the scraper sees its price change. The primary key clusters a
+-- product's observations together in time order, so a history or "price at" lookup is a short
+-- range read.
+CREATE TABLE price_observations (
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    observed_at DATETIME NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (unique_id, observed_at)
+);
+
+-- Daily low, high and closing price of the days a product's price changed. Days without a row
+-- kept the previous close.
+CREATE TABLE price_daily (
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    day DATE NOT NULL,
+    min_price DECIMAL(10, 2) NOT NULL,
+    max_price DECIMAL(10, 2) NOT NULL,
+    close_price DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (unique_id, day)
+);
+
+-- The current prices are the first observation of every product.
+INSERT INTO price_observations (unique_id, observed_at, price)
+SELECT unique_id, UTC_TIMESTAMP(), price FROM product_table WHERE price IS NOT NULL;
+
+INSERT INTO price_daily (unique_id, day, min_price, max_price, close_price)
+SELECT unique_id, UTC_DATE(), price, price, price FROM product_table WHERE price IS NOT NULL;
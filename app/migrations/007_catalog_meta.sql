@@ -0,0 +1,12 @@
+USE main_schema;
+
+-- Version counter the scraper bumps after every run that changed the catalog. The app polls it to
+-- refresh its catalog snapshot and builds ETags and result cache keys from it.
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    id TINYINT,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+
+INSERT IGNORE INTO catalog_meta (id, version) VALUES (1, 0);
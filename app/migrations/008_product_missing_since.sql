@@ -0,0 +1,6 @@
+USE main_schema;
+
+-- Set by the scraper when a fully scraped store no longer lists a product, cleared when it is
+-- listed again. Missing products keep their row, so wishlists, popularity and price history stay
+-- intact, but the grid no longer shows them.
+ALTER TABLE product_table ADD COLUMN missing_since DATETIME NULL;
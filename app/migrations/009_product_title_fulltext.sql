@@ -0,0 +1,9 @@
+USE main_schema;
+
+-- Grid search for the sql source (product_query.build_where). The ngram parser indexes every
+-- two-character sequence of the title, so a search term matches inside words, not only whole words.
+-- The stopword list is fixed when the index is built; with it enabled, ngrams such as "to" or "in"
+-- would be left out and terms containing them would stop matching.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE product_table ADD FULLTEXT KEY idx_product_title_ft (title) WITH PARSER ngram;
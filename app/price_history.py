@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+from handle_db_connections import execute_select
+
+# Longest window the price endpoints accept.
+MAX_HISTORY_DAYS = 730
+
+CURRENT_QUERY = "SELECT price, currency FROM product_table WHERE unique_id = %s"
+# Only the price_daily rows of the window and one observation are read, never the raw series.
+DAILY_QUERY = """
+SELECT day, min_price, max_price, close_price FROM price_daily
+WHERE unique_id = %s AND day >= %s
+ORDER BY day
+"""
+# The price in effect when the window opened: the last change before it.
+OPENING_QUERY = """
+SELECT price FROM price_observations
+WHERE unique_id = %s AND observed_at < %s
+ORDER BY observed_at DESC
+LIMIT 1
+"""
+
+def window_start(days):
+    """First UTC day of a window of `days` days ending today, as the scraper records days in UTC."""
+    days = min(max(days, 1), MAX_HISTORY_DAYS)
+    return datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+def _opening_price(connection, unique_id, start):
+    rows = execute_select(connection, OPENING_QUERY, (unique_id, datetime.combine(start, datetime.min.time())))
+    return rows[0]['price'] if rows else None
+
+def _current(connection, unique_id):
+    rows = execute_select(connection, CURRENT_QUERY, (unique_id,))
+    return rows[0] if rows else {'price': None, 'currency': None}
+
+def get_history(connection, unique_id, days):
+    """Daily low/high/close of a product over the window, or None if it has no price at all.
+
+    Days without a row kept the previous close; opening_price is the price the window started with.
+    """
+    start = window_start(days)
+    current = _current(connection, unique_id)
+    daily = execute_select(connection, DAILY_QUERY, (unique_id, start))
+    opening = _opening_price(connection, unique_id, start)
+    if current['price'] is None and not daily and opening is None:
+        return None
+    return {
+        'unique_id': unique_id,
+        'since': start.isoformat(),
+        'currency': current['currency'],
+        'current_price': current['price'],
+        'opening_price': opening,
+        'days': [{
+            'day': row['day'].isoformat(),
+            'min_price': row['min_price'],
+            'max_price': row['max_price'],
+            'close_price': row['close_price'],
+        } for row in daily],
+    }
+
+def get_lowest_price(connection, unique_id, days):
+    """Lowest price of a product over the window, or None if it has no price at all."""
+    history = get_history(connection, unique_id, days)
+    if history is None:
+        return None
+    prices = [row['min_price'] for row in history['days']]
+    prices += [price for price in (history['opening_price'], history['current_price']) if price is not None]
+    return {
+        'unique_id': unique_id,
+        'since': history['since'],
+        'currency': history['currency'],
+        'current_price': history['current_price'],
+        'lowest_price': min(prices),
+    }
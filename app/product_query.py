@@ -0,0 +1,267 @@
+import math
+import json
+import base64
+import threading
+from handle_db_connections import execute_select
+from title_index import tokenize
+
+PRODUCT_COLUMNS = "unique_id, title, price, currency, speed, glide, turn, fade, link_to_disc, image_url, store"
+# Fields /api/products can project; unique_id is always returned. The disc fields only exist
+# when the grid is grouped by disc (see group_offers).
+API_FIELDS = tuple(PRODUCT_COLUMNS.split(', '))
+DISC_API_FIELDS = ('canonical_id', 'offer_count', 'max_price')
+FLIGHT_FIELDS = ('speed', 'glide', 'turn', 'fade')
+
+class QueryArgumentError(ValueError):
+    """A cursor or field list the API cannot use; reported to the client as a 400."""
+
+# Rows the grid never shows: products no longer listed by their store, discs without flight
+# numbers and "karte" (gift card) listings.
+BASE_CONDITIONS = [
+    "missing_since IS NULL",
+    "speed IS NOT NULL",
+    "glide IS NOT NULL",
+    "turn IS NOT NULL",
+    "fade IS NOT NULL",
+    "LOWER(title) NOT LIKE '%%karte%%'",
+]
+
+# sort option -> (column, direction); unique_id is always appended as a tiebreaker in the same
+# direction, so one index on the column (which ends in the primary key) serves the whole ORDER BY.
+SORT_OPTIONS = {
+    'price_lowest': ('price', 'ASC'),
+    'price_highest': ('price', 'DESC'),
+    'title': ('title', 'ASC'),
+    'store': ('store', 'ASC'),
+}
+for _attr in ['speed', 'glide', 'turn', 'fade']:
+    SORT_OPTIONS[f'{_attr}_lowest'] = (_attr, 'ASC')
+    SORT_OPTIONS[f'{_attr}_highest'] = (_attr, 'DESC')
+
+STORES_QUERY = f"""
+SELECT DISTINCT store FROM product_table
+WHERE {' AND '.join(BASE_CONDITIONS)}
+"""
+# STORES_QUERY reads the whole table, and its answer only changes with the catalog, so it runs
+# once per catalog version (see fetch_stores).
+_stores_lock = threading.Lock()
+_stores_state = {'version': None, 'stores': frozenset()}
+
+# Search terms at least this long go through the title's FULLTEXT ngram index (ngram_token_size,
+# 2 by default); shorter ones fall back to LIKE.
+FULLTEXT_MIN_TERM = 2
+
+def parse_bound(args, key):
+    try:
+        value = float(args.get(key, ''))
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def build_where(args):
+    conditions = list(BASE_CONDITIONS)
+    params = []
+
+    # Every search term has to occur in the title, as in the memory source's title index. An
+    # ngram phrase matches anywhere in a word, so prefixes ("destr") and stretched spellings
+    # ("buzz" for "Buzzz") are found through the index instead of a LIKE scan.
+    terms = tokenize(args.get('search', ''))
+    phrases = [term for term in terms if len(term) >= FULLTEXT_MIN_TERM]
+    if phrases:
+        conditions.append("MATCH(title) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(' '.join(f'+"{term}"' for term in phrases))
+    for term in terms:
+        if len(term) < FULLTEXT_MIN_TERM:
+            conditions.append("LOWER(title) LIKE %s")
+            params.append(f"%{_escape_like(term)}%")
+
+    for attr in ['price', 'speed', 'glide', 'turn', 'fade']:
+        min_val = parse_bound(args, f'{attr}_min')
+        if min_val is not None:
+            conditions.append(f"{attr} >= %s")
+            params.append(min_val)
+        max_val = parse_bound(args, f'{attr}_max')
+        if max_val is not None:
+            conditions.append(f"{attr} <= %s")
+            params.append(max_val)
+
+    selected_stores = args.getlist('store')
+    if selected_stores:
+        placeholders = ', '.join(['%s'] * len(selected_stores))
+        conditions.append(f"store IN ({placeholders})")
+        params.extend(selected_stores)
+
+    return ' AND '.join(conditions), params
+
+def build_order_by(sort_option):
+    column, direction = SORT_OPTIONS.get(sort_option, ('unique_id', 'ASC'))
+    if column == 'unique_id':
+        return "ORDER BY unique_id ASC"
+    return f"ORDER BY {column} {direction}, unique_id {direction}"
+
+def build_product_query(args, page, per_page):
+    where, params = build_where(args)
+    sql_query = f"""
+    SELECT {PRODUCT_COLUMNS} FROM product_table
+    WHERE {where}
+    {build_order_by(args.get('sort', ''))}
+    LIMIT %s OFFSET %s
+    """
+    return sql_query, params + [per_page, (max(page, 1) - 1) * per_page]
+
+def build_count_query(args):
+    where, params = build_where(args)
+    sql_query = f"SELECT COUNT(*) AS total FROM product_table WHERE {where}"
+    return sql_query, params
+
+def group_offers(args):
+    """Whether the grid shows one row per disc. Picking stores or "all_offers" lists every offer."""
+    return not args.get('all_offers') and not args.getlist('store')
+
+# disc_offers holds each disc's cheapest offer, so filters and sorts apply to that offer's row.
+# Its columns are named apart from product_table's, so the shared WHERE and ORDER BY stay unqualified.
+DISC_FROM = "disc_offers d JOIN product_table p ON p.unique_id = d.cheapest_id"
+
+def build_disc_query(args, page, per_page):
+    where, params = build_where(args)
+    sql_query = f"""
+    SELECT {PRODUCT_COLUMNS}, d.canonical_id, d.offer_count, d.max_price FROM {DISC_FROM}
+    WHERE {where}
+    {build_order_by(args.get('sort', ''))}
+    LIMIT %s OFFSET %s
+    """
+    return sql_query, params + [per_page, (max(page, 1) - 1) * per_page]
+
+def build_disc_count_query(args):
+    where, params = build_where(args)
+    sql_query = f"SELECT COUNT(*) AS total FROM {DISC_FROM} WHERE {where}"
+    return sql_query, params
+
+def fetch_stores(connection, version=None):
+    """Stores the grid lists, re-read only when the catalog version changes or is unknown."""
+    if version is not None:
+        with _stores_lock:
+            if _stores_state['version'] == version:
+                return set(_stores_state['stores'])
+    stores = set(row['store'] for row in execute_select(connection, STORES_QUERY))
+    if version is not None:
+        with _stores_lock:
+            _stores_state['version'] = version
+            _stores_state['stores'] = frozenset(stores)
+    return stores
+
+def fetch_product_page(connection, args, page, per_page, version=None):
+    """Return (products, total_count, stores) for one grid page using SQL-side filtering.
+
+    `version` is the catalog version the store list may be reused for.
+    """
+    if group_offers(args):
+        sql_query, params = build_disc_query(args, page, per_page)
+        count_query, count_params = build_disc_count_query(args)
+    else:
+        sql_query, params = build_product_query(args, page, per_page)
+        count_query, count_params = build_count_query(args)
+    products = execute_select(connection, sql_query, tuple(params))
+    total = execute_select(connection, count_query, tuple(count_params))[0]['total']
+
+    return products, total, fetch_stores(connection, version)
+
+def _sort_option(args):
+    sort_option = args.get('sort', '')
+    return sort_option if sort_option in SORT_OPTIONS else ''
+
+def encode_cursor(sort_option, product):
+    """Opaque cursor for the page after `product`: its sort key and unique_id.
+
+    Unknown sort options are recorded as '' like _sort_option does, so the cursor matches the
+    request that continues from it.
+    """
+    if sort_option not in SORT_OPTIONS:
+        sort_option = ''
+    column, _ = SORT_OPTIONS.get(sort_option, ('unique_id', 'ASC'))
+    value = None if column == 'unique_id' else str(product[column])
+    key = json.dumps([sort_option, value, product['unique_id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort_option):
+    try:
+        key = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, unique_id = json.loads(key)
+    except (ValueError, TypeError) as e:
+        raise QueryArgumentError("Malformed cursor") from e
+    if cursor_sort != sort_option:
+        raise QueryArgumentError("Cursor was issued for a different sort")
+    return value, unique_id
+
+def build_keyset_condition(sort_option, value, unique_id):
+    # Rows strictly after (value, unique_id) in ORDER BY order. Spelled out rather than as a row
+    # comparison so MySQL can range-scan the sort column's index.
+    column, direction = SORT_OPTIONS.get(sort_option, ('unique_id', 'ASC'))
+    op = '>' if direction == 'ASC' else '<'
+    if column == 'unique_id':
+        return f"unique_id {op} %s", [unique_id]
+    return f"({column} {op} %s OR ({column} = %s AND unique_id {op} %s))", [value, value, unique_id]
+
+def parse_fields(value, grouped):
+    """Fields to return for a comma separated `fields` argument; all of them when it is empty."""
+    available = API_FIELDS + (DISC_API_FIELDS if grouped else ())
+    if not value:
+        return list(available)
+    fields = ['unique_id']
+    for field in value.split(','):
+        field = field.strip()
+        if field in fields or (field in DISC_API_FIELDS and not grouped):
+            continue
+        if field not in available:
+            raise QueryArgumentError(f"Unknown field: {field}")
+        fields.append(field)
+    return fields
+
+def build_keyset_query(args, after, limit, fields):
+    """One page of up to `limit` rows after the (value, unique_id) key `after`, or from the start."""
+    where, params = build_where(args)
+    sort_option = _sort_option(args)
+    if after is not None:
+        condition, keyset_params = build_keyset_condition(sort_option, *after)
+        where = f"{where} AND {condition}"
+        params = params + keyset_params
+
+    # The sort column is selected too, to build the next cursor from the last row.
+    sort_column = SORT_OPTIONS.get(sort_option, ('unique_id', 'ASC'))[0]
+    columns = list(fields) + ([sort_column] if sort_column not in fields else [])
+    if group_offers(args):
+        select = ', '.join(f"d.{column}" if column in DISC_API_FIELDS else column for column in columns)
+        source = DISC_FROM
+    else:
+        select = ', '.join(columns)
+        source = "product_table"
+    sql_query = f"""
+    SELECT {select} FROM {source}
+    WHERE {where}
+    {build_order_by(sort_option)}
+    LIMIT %s
+    """
+    return sql_query, params + [limit]
+
+def fetch_keyset_page(connection, args, cursor, limit, fields=None):
+    """Return (products, next_cursor) for /api/products; next_cursor is None on the last page."""
+    sort_option = _sort_option(args)
+    after = decode_cursor(cursor, sort_option) if cursor else None
+    fields = parse_fields(fields, group_offers(args))
+
+    # One extra row tells whether there is a next page.
+    sql_query, params = build_keyset_query(args, after, limit + 1, fields)
+    rows = execute_select(connection, sql_query, tuple(params))
+    next_cursor = encode_cursor(sort_option, rows[limit - 1]) if len(rows) > limit else None
+
+    products = []
+    for row in rows[:limit]:
+        product = {field: row[field] for field in fields}
+        for field in FLIGHT_FIELDS:
+            if product.get(field) is not None:
+                product[field] = float(product[field])
+        products.append(product)
+    return products, next_cursor
@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+
+import requests
+
+from result_cache import LRUCache
+
+# A recommendation is reused for this long; wishlist changes drop it earlier (see forget).
+RECOMMENDATION_TTL_SECONDS = float(os.getenv('RECOMMENDATION_TTL_SECONDS', 120))
+RECOMMENDATION_CACHE_ENTRIES = int(os.getenv('RECOMMENDATION_CACHE_ENTRIES', 1024))
+# Each call holds a sync worker, so a cold recommender is given up on quickly rather than waited for.
+RECOMMENDER_TIMEOUT = float(os.getenv('RECOMMENDER_TIMEOUT', 2))
+# Consecutive failures that open the breaker, and how long it then fails fast. A timeout opens it
+# at once, so a cold start costs one worker one timeout instead of several.
+RECOMMENDER_FAILURE_THRESHOLD = int(os.getenv('RECOMMENDER_FAILURE_THRESHOLD', 3))
+RECOMMENDER_COOLDOWN_SECONDS = float(os.getenv('RECOMMENDER_COOLDOWN_SECONDS', 30))
+
+UNAVAILABLE = {"title": "Recommendation unavailable", "unique_id": None}
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Fails fast after repeated errors, then lets a single trial call through once the cooldown passes."""
+
+    def __init__(self, failure_threshold, cooldown_seconds):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.cooldown_seconds or self._trial_running:
+                raise CircuitOpenError("Recommender circuit is open")
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self, trip=False):
+        """Count a failed call; trip=True opens the breaker regardless of the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if trip or self._opened_at is not None or self._failures >= self.failure_threshold:
+                # A failed trial restarts the cooldown.
+                self._opened_at = time.monotonic()
+
+class RecommendationClient:
+    """Per-user recommendations from the recommender service, cached briefly and guarded by a breaker."""
+
+    def __init__(self, url, timeout=RECOMMENDER_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(RECOMMENDER_FAILURE_THRESHOLD, RECOMMENDER_COOLDOWN_SECONDS)
+        self._cache = LRUCache(RECOMMENDATION_CACHE_ENTRIES)
+
+    def cached(self, user_id):
+        """The user's recommendation if one is cached and fresh, without calling the service."""
+        entry = self._cache.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def forget(self, user_id):
+        self._cache.delete(user_id)
+
+    def get(self, user_id, fresh=False):
+        """The user's recommendation. Raises CircuitOpenError or requests.RequestException."""
+        if not fresh:
+            recommendation = self.cached(user_id)
+            if recommendation is not None:
+                return recommendation
+
+        self.breaker.before_call()
+        try:
+            response = requests.get(self.url, params={"user_id": user_id}, timeout=self.timeout)
+            response.raise_for_status()
+            recommendation = response.json()
+            if not isinstance(recommendation, dict):
+                raise ValueError("not a JSON object")
+        except requests.Timeout:
+            self.breaker.record_failure(trip=True)
+            raise
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        except ValueError as e:
+            self.breaker.record_failure()
+            raise requests.RequestException(f"Invalid recommender response: {e}") from e
+        self.breaker.record_success()
+        # "No recommendations yet" answers are not kept: the next wishlist change or retry may have one.
+        if recommendation.get("unique_id"):
+            self._cache.set(user_id, (time.monotonic() + RECOMMENDATION_TTL_SECONDS, recommendation))
+        return recommendation
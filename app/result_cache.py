@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Results kept per worker process; the least recently used one is evicted beyond this.
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256))
+# Shared backend, e.g. redis://10.0.0.3:6379/0. Unset keeps the cache per process.
+RESULT_CACHE_REDIS_URL = os.getenv('RESULT_CACHE_REDIS_URL', '')
+# Entries carry the catalog version in their key, so this only bounds how long dead versions linger.
+RESULT_CACHE_TTL_SECONDS = int(os.getenv('RESULT_CACHE_TTL_SECONDS', 3600))
+# How long a process waits for another process computing the same result before doing it itself.
+RESULT_CACHE_WAIT_SECONDS = float(os.getenv('RESULT_CACHE_WAIT_SECONDS', 5))
+
+def canonical_key(namespace, version, args, exclude=()):
+    """Cache key for a request: its arguments sorted, blank values dropped and store order ignored."""
+    items = []
+    for name in sorted(args):
+        if name in exclude:
+            continue
+        values = [value for value in args.getlist(name) if value != '']
+        if name == 'store':
+            values.sort()
+        if values:
+            items.append([name, values])
+    digest = hashlib.sha1(json.dumps(items, separators=(',', ':')).encode()).hexdigest()
+    return f"{namespace}:{version}:{digest}"
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisBackend:
+    """Results shared between processes and instances, as JSON under a TTL.
+
+    Size is bounded by the TTL and the server's maxmemory policy (allkeys-lru is a good fit).
+    """
+
+    def __init__(self, url, ttl):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self._client.get(key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value):
+        self._client.set(key, json.dumps(value, default=str), ex=self.ttl)
+
+    def claim(self, key, seconds):
+        """True for the one process that gets to compute `key`; the lease expires after `seconds`."""
+        return bool(self._client.set(f"{key}:lock", 1, nx=True, px=int(seconds * 1000)))
+
+    def release(self, key):
+        self._client.delete(f"{key}:lock")
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class ResultCache:
+    """In-process LRU in front of an optional shared backend, with single-flight misses.
+
+    Identical misses in one process wait for the first one instead of computing again. With a
+    shared backend, processes also take a short lease, so a burst across workers computes once
+    and the others pick the result up from the backend. Backend errors fall back to computing.
+    Values must be JSON-serialisable to be shared (Decimals come back as strings).
+    """
+
+    def __init__(self, local, shared=None, wait_seconds=RESULT_CACHE_WAIT_SECONDS):
+        self.local = local
+        self.shared = shared
+        self.wait_seconds = wait_seconds
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'coalesced': 0, 'misses': 0, 'shared_errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count('coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._load(key, compute)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _load(self, key, compute):
+        value = self._shared_get(key)
+        if value is not None:
+            self._count('shared_hits')
+            self.local.set(key, value)
+            return value
+
+        claimed = self._shared_claim(key)
+        if not claimed:
+            # Another process is computing it: poll the backend for a while, then give up waiting.
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self._shared_get(key)
+                if value is not None:
+                    self._count('shared_hits')
+                    self.local.set(key, value)
+                    return value
+
+        self._count('misses')
+        try:
+            value = compute()
+            self.local.set(key, value)
+            self._shared_set(key, value)
+        finally:
+            if claimed and self.shared is not None:
+                self._shared_call(self.shared.release, key)
+        return value
+
+    def _shared_call(self, method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            self._count('shared_errors')
+            logger.warning(f"Result cache backend error: {e}")
+            return None
+
+    def _shared_get(self, key):
+        return None if self.shared is None else self._shared_call(self.shared.get, key)
+
+    def _shared_set(self, key, value):
+        if self.shared is not None:
+            self._shared_call(self.shared.set, key, value)
+
+    def _shared_claim(self, key):
+        if self.shared is None:
+            return True
+        claimed = self._shared_call(self.shared.claim, key, self.wait_seconds)
+        # An unreachable backend should not make every process wait.
+        return True if claimed is None else claimed
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._counters)
+        lookups = metrics['local_hits'] + metrics['shared_hits'] + metrics['coalesced'] + metrics['misses']
+        metrics['hit_ratio'] = round((lookups - metrics['misses']) / lookups, 4) if lookups else None
+        metrics['entries'] = len(self.local)
+        metrics['max_entries'] = self.local.max_entries
+        metrics['evictions'] = self.local.evictions
+        metrics['shared_backend'] = self.shared is not None
+        metrics['pid'] = os.getpid()
+        return metrics
+
+def build_cache():
+    shared = None
+    if RESULT_CACHE_REDIS_URL:
+        if redis is None:
+            logger.warning("RESULT_CACHE_REDIS_URL is set but the redis package is not installed")
+        else:
+            shared = RedisBackend(RESULT_CACHE_REDIS_URL, RESULT_CACHE_TTL_SECONDS)
+    return ResultCache(LRUCache(RESULT_CACHE_MAX_ENTRIES), shared)
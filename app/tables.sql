@@ -1,7 +1,10 @@
 USE main_schema;
 
+-- Built without stopwords, like migrations/009_product_title_fulltext.sql.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
 CREATE TABLE product_table (
-    unique_id VARCHAR(256),
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
     title VARCHAR(255),
     price DECIMAL(10, 2),
     currency VARCHAR(5),
@@ -12,7 +15,28 @@ CREATE TABLE product_table (
     link_to_disc VARCHAR(255),
     image_url VARCHAR(255),
     store VARCHAR(255),
-    PRIMARY KEY (unique_id)
+    content_hash CHAR(32),
+    canonical_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin,
+    missing_since DATETIME,
+    PRIMARY KEY (unique_id),
+    KEY idx_product_price (price),
+    KEY idx_product_speed (speed),
+    KEY idx_product_glide (glide),
+    KEY idx_product_turn (turn),
+    KEY idx_product_fade (fade),
+    KEY idx_product_title (title),
+    KEY idx_product_store_price (store, price),
+    KEY idx_product_canonical_price (canonical_id, price),
+    FULLTEXT KEY idx_product_title_ft (title) WITH PARSER ngram
+);
+
+CREATE TABLE disc_offers (
+    canonical_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    cheapest_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    offer_count INT NOT NULL,
+    max_price DECIMAL(10, 2),
+    PRIMARY KEY (canonical_id),
+    UNIQUE KEY idx_disc_offers_cheapest (cheapest_id)
 );
 
 CREATE TABLE users (
@@ -21,4 +45,63 @@ CREATE TABLE users (
     picture_url VARCHAR(255),
     product_history JSON,
     PRIMARY KEY (id)
-);
\ No newline at end of file
+);
+
+CREATE TABLE catalog_meta (
+    id TINYINT,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+);
+
+INSERT INTO catalog_meta (id, version) VALUES (1, 0);
+
+CREATE TABLE wishlist (
+    user_id VARCHAR(255) NOT NULL,
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    added_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, unique_id),
+    KEY idx_wishlist_unique_id (unique_id)
+);
+
+CREATE TABLE product_popularity (
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    wishlist_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (unique_id),
+    KEY idx_popularity_count (wishlist_count)
+);
+
+CREATE TABLE price_observations (
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    observed_at DATETIME NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (unique_id, observed_at)
+);
+
+CREATE TABLE price_daily (
+    unique_id CHAR(64) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    day DATE NOT NULL,
+    min_price DECIMAL(10, 2) NOT NULL,
+    max_price DECIMAL(10, 2) NOT NULL,
+    close_price DECIMAL(10, 2) NOT NULL,
+    PRIMARY KEY (unique_id, day)
+);
+
+-- Applied by migrate.py; a fresh install from this file already includes every migration below.
+CREATE TABLE schema_migrations (
+    version INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version)
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+    (1, '001_create_wishlist.sql'),
+    (2, '002_create_product_popularity.sql'),
+    (3, '003_add_product_content_hash.sql'),
+    (4, '004_product_table_indexes.sql'),
+    (5, '005_disc_offers.sql'),
+    (6, '006_price_history.sql'),
+    (7, '007_catalog_meta.sql'),
+    (8, '008_product_missing_since.sql'),
+    (9, '009_product_title_fulltext.sql');
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports its modules from app/ directly, as when main.py is run from there.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,50 @@
+import base64
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+product_query = pytest.importorskip("product_query")
+from product_query import QueryArgumentError, build_keyset_condition, decode_cursor, encode_cursor
+
+PRODUCT = {"unique_id": "abc123", "title": "Destroyer", "price": 18.5, "speed": 12}
+
+
+@pytest.mark.parametrize("sort_option", ["", "price_lowest", "price_highest", "title", "speed_highest"])
+def test_cursor_round_trip(sort_option):
+    cursor = encode_cursor(sort_option, PRODUCT)
+    column = product_query.SORT_OPTIONS.get(sort_option, ("unique_id", "ASC"))[0]
+    expected = None if column == "unique_id" else str(PRODUCT[column])
+
+    assert decode_cursor(cursor, sort_option) == (expected, "abc123")
+    assert "=" not in cursor
+
+
+def test_cursor_records_the_normalised_sort():
+    args = MultiDict({"sort": "no_such_sort"})
+    sort_option = product_query._sort_option(args)
+    cursor = encode_cursor(args.get("sort"), PRODUCT)
+
+    assert sort_option == ""
+    assert decode_cursor(cursor, sort_option) == (None, "abc123")
+
+
+def test_cursor_from_another_sort_is_rejected():
+    cursor = encode_cursor("price_lowest", PRODUCT)
+    with pytest.raises(QueryArgumentError):
+        decode_cursor(cursor, "price_highest")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", base64.urlsafe_b64encode(b"[1,2]").decode(), ""])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(QueryArgumentError):
+        decode_cursor(cursor, "")
+
+
+def test_keyset_condition_follows_sort_direction():
+    condition, params = build_keyset_condition("price_highest", "18.5", "abc123")
+    assert condition == "(price < %s OR (price = %s AND unique_id < %s))"
+    assert params == ["18.5", "18.5", "abc123"]
+
+    condition, params = build_keyset_condition("", None, "abc123")
+    assert condition == "unique_id > %s"
+    assert params == ["abc123"]
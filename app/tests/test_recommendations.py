@@ -0,0 +1,136 @@
+import pytest
+import requests
+
+import recommendations
+from recommendations import CircuitBreaker, CircuitOpenError, RecommendationClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(recommendations.time, "monotonic", clock.monotonic)
+    return clock
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    breaker.before_call()
+
+
+def test_trip_opens_at_once(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30)
+    breaker.record_failure(trip=True)
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_single_trial_after_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    breaker.record_failure()
+    clock.now += 31
+
+    breaker.before_call()
+    # Only one call probes the service while the trial runs.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_trial_restarts_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    breaker.record_failure()
+    clock.now += 31
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 20
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 11
+    breaker.before_call()
+
+
+def test_client_timeout_opens_breaker(clock, monkeypatch):
+    calls = []
+
+    def timing_out(url, params, timeout):
+        calls.append(timeout)
+        raise requests.Timeout("cold start")
+
+    monkeypatch.setattr(recommendations.requests, "get", timing_out)
+    client = RecommendationClient("http://recommender/recommend", timeout=1)
+
+    with pytest.raises(requests.Timeout):
+        client.get("u1")
+    with pytest.raises(CircuitOpenError):
+        client.get("u1")
+    assert calls == [1]
+
+
+def test_client_caches_only_real_recommendations(clock, monkeypatch):
+    payloads = [{"title": "No recommendations yet", "unique_id": None}, {"title": "Buzzz", "unique_id": "p1"}]
+    calls = []
+
+    def get(url, params, timeout):
+        calls.append(params["user_id"])
+        return FakeResponse(payloads[len(calls) - 1])
+
+    monkeypatch.setattr(recommendations.requests, "get", get)
+    client = RecommendationClient("http://recommender/recommend")
+
+    assert client.get("u1")["unique_id"] is None
+    assert client.cached("u1") is None
+    assert client.get("u1")["unique_id"] == "p1"
+    assert client.get("u1")["unique_id"] == "p1"
+    assert len(calls) == 2
+
+    clock.now += recommendations.RECOMMENDATION_TTL_SECONDS + 1
+    assert client.cached("u1") is None
+
+
+def test_client_rejects_non_object_responses(clock, monkeypatch):
+    monkeypatch.setattr(recommendations.requests, "get", lambda url, params, timeout: FakeResponse(["p1"]))
+    client = RecommendationClient("http://recommender/recommend")
+
+    with pytest.raises(requests.RequestException):
+        client.get("u1")
+    assert client.cached("u1") is None
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+import result_cache
+from result_cache import LRUCache, RedisBackend, ResultCache
+
+
+class FailingBackend:
+    """A shared backend that is unreachable."""
+
+    def get(self, key):
+        raise ConnectionError("backend down")
+
+    def set(self, key, value):
+        raise ConnectionError("backend down")
+
+    def claim(self, key, seconds):
+        raise ConnectionError("backend down")
+
+    def release(self, key):
+        raise ConnectionError("backend down")
+
+
+@pytest.fixture
+def redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisBackend.__new__(RedisBackend)
+    backend._client = fakeredis.FakeRedis()
+    backend.ttl = 60
+    return backend
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache(LRUCache(8))
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"rows": [1, 2]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(5)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Let the followers reach the in-flight computation before it finishes.
+    while cache.metrics()['coalesced'] < len(threads) - 1:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"rows": [1, 2]}] * len(threads)
+    assert cache.metrics()['misses'] == 1
+
+
+def test_followers_see_the_leaders_error():
+    cache = ResultCache(LRUCache(8))
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("query failed")
+
+    errors = []
+
+    def lookup():
+        try:
+            cache.get_or_compute("k", compute)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=lookup)
+    follower.start()
+    while cache.metrics()['coalesced'] < 1:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["query failed", "query failed"]
+    # A failed computation is not cached.
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+
+def test_shared_backend_serves_other_processes(redis_backend):
+    first = ResultCache(LRUCache(8), redis_backend)
+    second = ResultCache(LRUCache(8), redis_backend)
+
+    assert first.get_or_compute("k", lambda: {"page": 1}) == {"page": 1}
+    assert second.get_or_compute("k", lambda: pytest.fail("computed twice")) == {"page": 1}
+    assert second.metrics()['shared_hits'] == 1
+    # The lease is released once the result is stored.
+    assert redis_backend._client.get("k:lock") is None
+
+
+def test_waits_for_the_process_holding_the_lease(redis_backend):
+    cache = ResultCache(LRUCache(8), redis_backend, wait_seconds=2)
+    assert redis_backend.claim("k", 2)
+    threading.Timer(0.2, redis_backend.set, ("k", {"page": 1})).start()
+
+    assert cache.get_or_compute("k", lambda: pytest.fail("computed while leased")) == {"page": 1}
+    assert cache.metrics()['shared_hits'] == 1
+
+
+def test_unreachable_backend_falls_back_to_computing():
+    cache = ResultCache(LRUCache(8), FailingBackend(), wait_seconds=5)
+
+    assert cache.get_or_compute("k", lambda: [1]) == [1]
+    assert cache.get_or_compute("k", lambda: pytest.fail("not cached locally")) == [1]
+    metrics = cache.metrics()
+    assert metrics['misses'] == 1
+    assert metrics['local_hits'] == 1
+    assert metrics['shared_errors'] > 0
+
+
+def test_build_cache_without_redis_url(monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_REDIS_URL", "")
+    cache = result_cache.build_cache()
+    assert cache.shared is None
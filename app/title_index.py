@@ -0,0 +1,110 @@
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# How well a query term matched a title word; a row's relevance is the sum over the query terms.
+EXACT_MATCH = 3
+PREFIX_MATCH = 2
+TYPO_MATCH = 1
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def typo_budget(term):
+    """Edits tolerated for a query term: none for short terms, one up to 7 letters, then two."""
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+def _trigrams(word):
+    padded = f"$${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class TitleIndex:
+    """Inverted index over title words with prefix lookups and typo-tolerant matching.
+
+    Every query term has to match some word of a title: exactly, as a prefix ("destr" finds
+    "Destroyer") or within typo_budget edits ("buzz" finds "Buzzz"). Candidates for typo
+    matching come from a trigram index over the vocabulary, so a query only touches the words
+    that could match, never every title.
+    """
+
+    def __init__(self, titles):
+        self.size = len(titles)
+        postings = defaultdict(list)
+        for row, title in enumerate(titles):
+            for token in set(tokenize(title)):
+                postings[token].append(row)
+
+        self.vocabulary = sorted(postings)
+        self.postings = [np.array(postings[token], dtype=np.int32) for token in self.vocabulary]
+
+        trigram_postings = defaultdict(list)
+        for token_id, token in enumerate(self.vocabulary):
+            for gram in _trigrams(token):
+                trigram_postings[gram].append(token_id)
+        self._trigram_postings = dict(trigram_postings)
+
+    def _term_matches(self, term):
+        """token_id -> match score for one query term."""
+        matches = {}
+
+        position = bisect_left(self.vocabulary, term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+            matches[position] = EXACT_MATCH if self.vocabulary[position] == term else PREFIX_MATCH
+            position += 1
+
+        budget = typo_budget(term)
+        if budget:
+            grams = _trigrams(term)
+            # One edit changes at most three trigrams.
+            needed = max(1, len(grams) - 3 * budget)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigram_postings.get(gram, ()))
+            for token_id, count in shared.items():
+                if count < needed or token_id in matches:
+                    continue
+                if edit_distance(term, self.vocabulary[token_id], budget) <= budget:
+                    matches[token_id] = TYPO_MATCH
+        return matches
+
+    def scores(self, query):
+        """Relevance of every row for the query (0 where it does not match), or None if it has no words."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+
+        total = np.zeros(self.size, dtype=np.float32)
+        matched = np.ones(self.size, dtype=bool)
+        for term in terms:
+            term_scores = np.zeros(self.size, dtype=np.int8)
+            for token_id, score in self._term_matches(term).items():
+                rows = self.postings[token_id]
+                term_scores[rows] = np.maximum(term_scores[rows], score)
+            matched &= term_scores > 0
+            total += term_scores
+        total[~matched] = 0
+        return total
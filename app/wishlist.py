@@ -0,0 +1,54 @@
+from handle_db_connections import execute_select
+
+# A plain INSERT, so a bad value still fails; re-adding an item is a no-op that affects no rows.
+ADD_QUERY = """
+INSERT INTO wishlist (user_id, unique_id) VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE unique_id = unique_id
+"""
+PRODUCT_EXISTS_QUERY = "SELECT 1 FROM product_table WHERE unique_id = %s"
+REMOVE_QUERY = "DELETE FROM wishlist WHERE user_id = %s AND unique_id = %s"
+PRODUCTS_QUERY = """
+SELECT p.*
+FROM wishlist w
+JOIN product_table p ON p.unique_id = w.unique_id
+WHERE w.user_id = %s
+ORDER BY w.added_at, w.unique_id
+"""
+
+class UnknownProductError(ValueError):
+    """The wishlist was asked to add a product that is not in product_table."""
+
+POPULARITY_INCREMENT = """
+INSERT INTO product_popularity (unique_id, wishlist_count) VALUES (%s, 1)
+ON DUPLICATE KEY UPDATE wishlist_count = wishlist_count + 1
+"""
+POPULARITY_DECREMENT = """
+UPDATE product_popularity SET wishlist_count = GREATEST(wishlist_count - 1, 0)
+WHERE unique_id = %s
+"""
+
+def _change_wishlist(connection, query, popularity_query, user_id, unique_id):
+    # The wishlist row and its popularity count change in the same transaction.
+    with connection.cursor() as cursor:
+        try:
+            changed = cursor.execute(query, (user_id, unique_id))
+            if changed:
+                cursor.execute(popularity_query, (unique_id,))
+            connection.commit()
+        except Exception as e:
+            print(f"Wishlist update error: {e}")
+            connection.rollback()
+            raise
+    return changed
+
+def add_item(connection, user_id, unique_id):
+    # Returns 1 when the item was added, 0 when it was already on the wishlist.
+    if not execute_select(connection, PRODUCT_EXISTS_QUERY, (unique_id,)):
+        raise UnknownProductError(f"Unknown product: {unique_id}")
+    return _change_wishlist(connection, ADD_QUERY, POPULARITY_INCREMENT, user_id, unique_id)
+
+def remove_item(connection, user_id, unique_id):
+    return _change_wishlist(connection, REMOVE_QUERY, POPULARITY_DECREMENT, user_id, unique_id)
+
+def get_products(connection, user_id):
+    return execute_select(connection, PRODUCTS_QUERY, (user_id,))
@@ -12,6 +12,11 @@ try:
     print("Import successful.")
 
     print("About to run all scrapers...")
-    run_all_scrapers()
+    results = run_all_scrapers()
 except Exception as e:
-    print("An error occurred:", e)
\ No newline at end of file
+    print("An error occurred:", e)
+    sys.exit(1)
+
+if not any(result["status"] == "ok" for result in results):
+    print("Every scraper job failed.")
+    sys.exit(1)
\ No newline at end of file
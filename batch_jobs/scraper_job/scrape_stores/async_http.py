@@ -0,0 +1,165 @@
+import os
+import random
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from scrape_stores.http_client import (
+    get_cache, conditional_headers, FetchError, USER_AGENT, ACCEPT_ENCODING, HTTP_TIMEOUT,
+)
+
+# Requests per second allowed against one host, and how many may be sent back to back.
+SCRAPER_HOST_RATE = float(os.getenv('SCRAPER_HOST_RATE', 1.0))
+SCRAPER_HOST_BURST = int(os.getenv('SCRAPER_HOST_BURST', 1))
+# Requests in flight at once; overlaps response latency while the token bucket keeps the pace.
+SCRAPER_FETCH_CONCURRENCY = int(os.getenv('SCRAPER_FETCH_CONCURRENCY', 4))
+SCRAPER_FETCH_RETRIES = int(os.getenv('SCRAPER_FETCH_RETRIES', 4))
+SCRAPER_PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', 2))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 60
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket: acquire() waits until a request may be sent."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after_seconds(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncFetcher:
+    """Fetches pages concurrently under a per-host rate limit and parses them off the event loop.
+
+    parse(html, url) runs in a thread pool and must return something JSON-serialisable, because
+    results are stored in the same on-disk cache as http_client.fetch_parsed and reused on 304
+    when they came from the same parser `version`.
+    """
+
+    def __init__(self, parse, version=None, concurrency=SCRAPER_FETCH_CONCURRENCY, rate=SCRAPER_HOST_RATE,
+                 burst=SCRAPER_HOST_BURST, retries=SCRAPER_FETCH_RETRIES, parse_workers=SCRAPER_PARSE_WORKERS):
+        self.parse = parse
+        self.version = version
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets = {}
+        self._parse_pool = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="parse")
+        self._cache = get_cache()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, MAX_BACKOFF_SECONDS)
+        return min(2 ** attempt + random.uniform(0, 1), MAX_BACKOFF_SECONDS)
+
+    async def _get(self, session, url, entry):
+        """One GET. Returns (body, encoding, headers), all None when the cached copy is still valid."""
+        await self._bucket(url).acquire()
+        async with self._semaphore:
+            async with session.get(url, headers=conditional_headers(entry)) as response:
+                if response.status == 304 and entry:
+                    return None, None, None
+                if response.status in RETRY_STATUSES:
+                    raise _RetryableStatus(response.status, _retry_after_seconds(response.headers.get("Retry-After")))
+                if response.status >= 400:
+                    raise FetchError(f"HTTP {response.status} for {url}")
+                return await response.read(), response.charset or 'utf-8', response.headers
+
+    async def fetch_parsed(self, session, url):
+        entry = self._cache.get(url)
+        for attempt in range(self.retries + 1):
+            try:
+                body, encoding, headers = await self._get(session, url, entry)
+                break
+            except (_RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise FetchError(f"{url} failed after {attempt + 1} attempts: {e}") from e
+                delay = self._backoff(attempt, getattr(e, "retry_after", None))
+                print(f"Retrying {url} in {delay:.1f}s after: {e or type(e).__name__}")
+                await asyncio.sleep(delay)
+
+        if body is None and "parsed" in entry and entry.get("parse_version") == self.version:
+            return entry["parsed"]
+        if body is None:
+            body, encoding = entry["content"], entry.get("encoding") or 'utf-8'
+
+        html_content = body.decode(encoding, errors='replace')
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(self._parse_pool, self.parse, html_content, url)
+
+        if headers is not None and (headers.get("ETag") or headers.get("Last-Modified")):
+            entry = self._cache.store_body(url, body, encoding, headers.get("ETag"), headers.get("Last-Modified"))
+        if entry is not None:
+            self._cache.store_parsed(url, entry, parsed, self.version)
+        return parsed
+
+    async def run(self, urls, handle):
+        failures = []
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING}
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
+                tasks = [asyncio.ensure_future(self.fetch_parsed(session, url)) for url in urls]
+                for task in asyncio.as_completed(tasks):
+                    try:
+                        parsed = await task
+                    except Exception as e:
+                        print(f"Fetch failed: {e}")
+                        failures.append(e)
+                        continue
+                    handle(parsed)
+        finally:
+            self._parse_pool.shutdown(wait=True)
+        return failures
+
+
+def fetch_all(urls, parse, handle, **options):
+    """Fetch and parse every URL, calling handle(parsed) as results complete.
+
+    Raises FetchError once all URLs are done if any of them still failed, so the store is not
+    treated as fully scraped and its unseen products are kept.
+    """
+    async def main():
+        return await AsyncFetcher(parse, **options).run(urls, handle)
+
+    failures = asyncio.run(main())
+    if failures:
+        raise FetchError(f"{len(failures)} of {len(urls)} pages failed, first: {failures[0]}")
@@ -0,0 +1,159 @@
+import os
+import asyncio
+import threading
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+# Tabs that may render at the same time, shared by every Playwright-based store.
+BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', 4))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_URL_PARTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+)
+
+
+class RenderError(Exception):
+    """A page did not load; the store's scrape fails instead of treating it as an empty page."""
+
+
+async def _render(page, url, wait_selector, timeout):
+    print(f"Visiting: {url}")
+    try:
+        response = await page.goto(url, timeout=timeout)
+    except Exception as e:
+        raise RenderError(f"Error navigating to {url}: {e}") from e
+    if response is not None and not response.ok:
+        raise RenderError(f"HTTP {response.status} for {url}")
+    try:
+        await page.wait_for_load_state("networkidle", timeout=5000)  # Wait for all requests
+        if wait_selector:
+            await page.wait_for_selector(wait_selector, timeout=5000)  # wait for content
+    except PlaywrightTimeout:
+        # A loaded page without cards is how listings end, so this is left to the caller.
+        print(f"Timeout waiting for product cards on {url}")
+    return await page.content()
+
+
+class BrowserPool:
+    """One headless Chromium shared by the whole scrape run.
+
+    Playwright objects are bound to the event loop that created them, so the browser lives on a
+    dedicated thread and scraper threads submit work to it. Each call gets its own tab.
+    """
+
+    def __init__(self, max_pages=BROWSER_MAX_PAGES):
+        self._max_pages = max_pages
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page_slots = None
+
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+            self._thread.start()
+            try:
+                self._call(self._launch())
+            except Exception:
+                self._stop_loop()
+                raise
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._context = await self._browser.new_context(user_agent=USER_AGENT)
+        await self._context.route("**/*", self._filter_request)
+        self._page_slots = asyncio.Semaphore(self._max_pages)
+
+    async def _filter_request(self, route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _with_page(self, fn, *args):
+        async with self._page_slots:
+            page = await self._context.new_page()
+            try:
+                return await fn(page, *args)
+            finally:
+                await page.close()
+
+    def run_page(self, fn, *args):
+        """Run the coroutine function fn(page, *args) in a new tab and return its result."""
+        self.start()
+        return self._call(self._with_page(fn, *args))
+
+    def render(self, url, wait_selector=None, timeout=10000):
+        return self.run_page(_render, url, wait_selector, timeout)
+
+    def render_many(self, urls, wait_selector=None, timeout=10000):
+        """Render several URLs in parallel tabs; the HTML comes back in the order of `urls`."""
+        self.start()
+
+        async def render_all():
+            return await asyncio.gather(*(self._with_page(_render, url, wait_selector, timeout) for url in urls))
+
+        return self._call(render_all())
+
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            try:
+                self._call(self._shutdown())
+            finally:
+                self._stop_loop()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    async def _shutdown(self):
+        if self._context:
+            await self._context.close()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._context = self._browser = self._playwright = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+def close_browser_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -1,170 +1,65 @@
 import sys
 import os
-import requests
-import hashlib
-
-from bs4 import BeautifulSoup
-from xml.etree import ElementTree as ET
 
 current_directory = os.path.dirname(os.path.realpath(__file__))
 app_directory = os.path.abspath(os.path.join(current_directory, '..', '..'))
 sys.path.append(app_directory)
 
-from handle_db_connections import create_conn
-
-def get_data_par3():
-
-    url_placeholder = 1
-
-    while True:
-
-        all_products = []
-
-        print("getting par3 page")
-        page_url = f"https://www.par3.lv/collections/disku-golfa-diski?page={url_placeholder}"
-
-
-        
-        response = requests.get(page_url)
-
-        html_content = response.text
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        ############################################################################################
-
-        parent_div = soup.find('product-list', class_="product-list")
-
-        if not parent_div:
-            break
-
-        products = parent_div.find_all('product-card', recursive=False)
+from scrape_stores.product_sink import use_sink
+from scrape_stores.html_parser import parse
+from scrape_stores.pipeline import FLIGHT_RATING_KEYS
+from scrape_stores.store_adapter import HttpListingAdapter
 
-        for product in products:
+class Par3Adapter(HttpListingAdapter):
+    store = "par3.lv"
+    base_url = "https://par3.lv"
+    card_selector = "product-list.product-list > product-card"
 
-            title = product.find('span', class_="product-card__title").get_text(strip=True)
+    def page_url(self, page_number):
+        return f"https://www.par3.lv/collections/disku-golfa-diski?page={page_number}"
 
-            if product.find('sale-price') is not None:
-                price_element = product.find('sale-price')
-                price_element = price_element.contents[-1].strip()
+    def parse_page(self, html_content):
+        # The pagination sits outside the product list, so this store parses the whole page.
+        page = parse(html_content)
+        products = self.map_cards(page.select(self.card_selector))
 
-            numeric_value = ''.join([char for char in price_element if char.isdigit() or char == ',' or char == '.'])
-            currency_symbol = ''.join([char for char in price_element if not char.isdigit() and char != ',' and char != '.'])
-            amount = float(numeric_value.replace(",", "."))
-
-            flight_ratings = {}
-            spec_card = product.find('div', class_='specs_card')
-
-            if spec_card:
-                text_content = spec_card.get_text(strip=True)
-                flight_rating_element = [element.strip() for element in text_content.split('|')]
-                flight_ratings['Speed'] = flight_rating_element[0]
-                flight_ratings['Glide'] = flight_rating_element[1]
-                flight_ratings['Turn'] = flight_rating_element[2]
-                flight_ratings['Fade'] = flight_rating_element[3]
-            else:
-                flight_ratings['Speed'] = None
-                flight_ratings['Glide'] = None
-                flight_ratings['Turn'] = None
-                flight_ratings['Fade'] = None
-
-            if flight_ratings.get('Speed') == '':
-                flight_ratings['Speed'] = None
-            if flight_ratings.get('Glide') == '':
-                flight_ratings['Glide'] = None
-            if flight_ratings.get('Turn') == '':
-                flight_ratings['Turn'] = None
-            if flight_ratings.get('Fade') == '':
-                flight_ratings['Fade'] = None
-
-            link_to_disc_element = product.find('a')
-            link_to_disc = "https://par3.lv" + link_to_disc_element['href'] if link_to_disc_element else 'No link found'
-
-            images = product.find('div', class_="product-card__figure")
-            image_url = "https://" + images.find_all("img")[0]["src"].replace("//", "")
-
-            result = {
-                'title': title,
-                'price': amount,
-                'currency': currency_symbol,
-                'flight_ratings': flight_ratings,
-                'link_to_disc': link_to_disc,
-                'image_url': image_url,
-                'store': "par3.lv"
-            }
-
-            combined = f"{result.get('title')}_{result.get('store')}"
-            combined = combined.lower().replace(' ', '')
-            unique_id = hashlib.sha256(combined.encode()).hexdigest()
-
-            result["unique_id"] = unique_id
-
-            all_products.append(result)
-
-        url_placeholder = url_placeholder + 1
-
-        pagination_span = soup.find('span', class_='pagination__current')
+        last_page = True
+        pagination_span = page.select_one('span.pagination__current')
         if pagination_span:
             try:
-                current, max_page = pagination_span.get_text(strip=True).split('/')
-                current_page = int(current.strip())
-                max_page = int(max_page.strip())
-                if url_placeholder > max_page:
-                    print(f"Reached end: page {url_placeholder} > {max_page}")
-                    break
+                current, max_page = pagination_span.text(strip=True).split('/')
+                last_page = int(current.strip()) >= int(max_page.strip())
             except Exception as e:
                 print(f"Could not parse pagination: {e}")
-                break
         else:
             print("Pagination element not found, assuming last page")
-            break
 
-        ############################################################################################
+        return {"products": products, "last_page": last_page}
+
+    def map_card(self, product):
+
+        title = product.select_one('span.product-card__title').text(strip=True)
 
-        connection = create_conn()
+        price_element = product.select_one('sale-price').own_texts()[-1].strip()
 
-        try:
+        flight_ratings = {}
+        spec_card = product.select_one('div.specs_card')
+        if spec_card:
+            text_content = spec_card.text(strip=True)
+            flight_ratings = dict(zip(FLIGHT_RATING_KEYS, text_content.split('|')))
 
-            with connection.cursor() as cursor:
+        link_to_disc_element = product.select_one('a')
 
-                sql = """
-                INSERT INTO product_table (unique_id, title, price, currency, speed, glide, turn, fade, link_to_disc, image_url, store)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                unique_id = VALUES(unique_id),
-                price = VALUES(price),
-                currency = VALUES(currency),
-                speed = VALUES(speed),
-                glide = VALUES(glide),
-                turn = VALUES(turn),
-                fade = VALUES(fade),
-                link_to_disc = VALUES(link_to_disc),
-                image_url = VALUES(image_url);
-                """
-                
-                data = [
-                    (
-                        product['unique_id'],
-                        product['title'],
-                        product['price'],
-                        product['currency'],
-                        product['flight_ratings']['Speed'],
-                        product['flight_ratings']['Glide'],
-                        product['flight_ratings']['Turn'],
-                        product['flight_ratings']['Fade'],
-                        product['link_to_disc'],
-                        product['image_url'],
-                        product['store']
-                    )
-                    for product in all_products
-                ]
+        image = product.select_one('div.product-card__figure img')
 
-                cursor.executemany(sql, data)
-                connection.commit()
+        return {
+            'title': title,
+            'price': price_element,
+            'flight_ratings': flight_ratings,
+            'link_to_disc': link_to_disc_element.attr('href') if link_to_disc_element else None,
+            'image_url': image.attr('src'),
+        }
 
-        finally:
-            
-            connection.close()
-            
 if __name__ == "__main__":
-    get_data_par3()
\ No newline at end of file
+    with use_sink() as sink:
+        Par3Adapter().run(sink)
@@ -0,0 +1,126 @@
+import os
+import hashlib
+import threading
+
+from handle_db_connections import create_conn
+
+# A store's missing products are only marked when fewer than this share of its catalog vanished,
+# so a half-broken scrape cannot hide the store.
+DISAPPEARED_MAX_SHARE = float(os.getenv('DISAPPEARED_MAX_SHARE', 0.5))
+
+
+def _number(value, digits):
+    if value is None or value == '':
+        return ''
+    try:
+        return f"{float(str(value).replace(',', '.')):.{digits}f}"
+    except ValueError:
+        return str(value).strip()
+
+
+def fingerprint(product):
+    """Digest of every column the upsert writes, normalised the way MySQL will store it."""
+    ratings = product['flight_ratings']
+    parts = [
+        product['title'],
+        _number(product['price'], 2),
+        product['currency'] or '',
+        _number(ratings['Speed'], 1),
+        _number(ratings['Glide'], 1),
+        _number(ratings['Turn'], 1),
+        _number(ratings['Fade'], 1),
+        product['link_to_disc'] or '',
+        product['image_url'] or '',
+    ]
+    return hashlib.md5('\x1f'.join(parts).encode()).hexdigest()
+
+
+class DigestMap:
+    """unique_id -> (store, content_hash) of what product_table currently holds.
+
+    `missing` holds the products already marked as no longer listed; seeing one of them again
+    writes it even when its content is unchanged, which clears the mark.
+    """
+
+    def __init__(self, digests, missing=()):
+        self._digests = digests
+        self._missing = set(missing)
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    @classmethod
+    def load(cls):
+        connection = create_conn()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT unique_id, store, content_hash, missing_since FROM product_table")
+                rows = cursor.fetchall()
+        finally:
+            connection.close()
+        return cls({unique_id: (store, content_hash) for unique_id, store, content_hash, _ in rows},
+                   [unique_id for unique_id, _, _, missing_since in rows if missing_since is not None])
+
+    def check(self, product, content_hash):
+        """Record the product as seen and return True when it has to be written."""
+        unique_id = product['unique_id']
+        with self._lock:
+            self._seen.add(unique_id)
+            previous = self._digests.get(unique_id)
+            if previous is not None and previous[1] == content_hash and unique_id not in self._missing:
+                self.unchanged += 1
+                return False
+            self._missing.discard(unique_id)
+            if previous is None:
+                self.inserted += 1
+            else:
+                self.updated += 1
+            self._digests[unique_id] = (product['store'], content_hash)
+            return True
+
+    def disappeared(self, store):
+        """Listed products of `store` that were not seen in this run."""
+        with self._lock:
+            return [unique_id for unique_id, (row_store, _) in self._digests.items()
+                    if row_store == store and unique_id not in self._seen and unique_id not in self._missing]
+
+    def store_size(self, store):
+        """How many products of `store` were listed before this run."""
+        with self._lock:
+            return sum(1 for unique_id, (row_store, _) in self._digests.items()
+                       if row_store == store and unique_id not in self._missing)
+
+
+def mark_disappeared(digests, stores):
+    """Mark products of fully scraped stores that were not seen in this run as missing. Returns the count.
+
+    Rows are kept rather than deleted, so a product that is only briefly unlisted keeps its wishlist
+    entries, popularity and price history, and comes back as soon as a scrape sees it again.
+    """
+    marked = 0
+    connection = None
+    try:
+        for store in stores:
+            missing = digests.disappeared(store)
+            if not missing:
+                continue
+            if len(missing) > DISAPPEARED_MAX_SHARE * digests.store_size(store):
+                print(f"[{store}] {len(missing)} products missing, more than {DISAPPEARED_MAX_SHARE:.0%}; keeping them")
+                continue
+            if connection is None:
+                connection = create_conn()
+            with connection.cursor() as cursor:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f"UPDATE product_table SET missing_since = UTC_TIMESTAMP() "
+                                   f"WHERE unique_id IN ({placeholders})", chunk)
+            connection.commit()
+            print(f"[{store}] marked {len(missing)} products no longer listed as missing")
+            marked += len(missing)
+    finally:
+        if connection is not None:
+            connection.close()
+    return marked
@@ -0,0 +1,189 @@
+import os
+
+from bs4 import BeautifulSoup, Comment, NavigableString, SoupStrainer
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+    HAVE_LXML_HTML = True
+except ImportError:  # lxml.html needs lxml, its cssselect() needs the cssselect package
+    HAVE_LXML_HTML = False
+
+try:
+    import lxml  # noqa: F401  C tree builder for BeautifulSoup
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+
+class Node:
+    """One element of a parsed page.
+
+    Store modules extract fields through these methods only, so a page can be parsed by any
+    backend: BeautifulSoup with either tree builder, or lxml.html, which selects in C.
+    """
+
+    def select(self, selector):
+        """Descendants matching the CSS selector, in document order."""
+        raise NotImplementedError
+
+    def select_one(self, selector):
+        found = self.select(selector)
+        return found[0] if found else None
+
+    def text(self, strip=False):
+        """All text below the element; with strip, every piece stripped and joined without spaces."""
+        raise NotImplementedError
+
+    def own_texts(self):
+        """The element's direct text children, without the text of nested elements."""
+        raise NotImplementedError
+
+    def attr(self, name):
+        """Attribute value, or None when the element does not have it."""
+        raise NotImplementedError
+
+    def remove(self, selector):
+        """Drop the descendants matching the selector, e.g. screen-reader-only price labels."""
+        raise NotImplementedError
+
+
+class SoupNode(Node):
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, selector):
+        return [SoupNode(tag) for tag in self._tag.select(selector)]
+
+    def text(self, strip=False):
+        return self._tag.get_text(strip=strip)
+
+    def own_texts(self):
+        return [str(child) for child in self._tag.contents
+                if isinstance(child, NavigableString) and not isinstance(child, Comment)]
+
+    def attr(self, name):
+        value = self._tag.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def remove(self, selector):
+        for tag in self._tag.select(selector):
+            tag.decompose()
+
+
+class LxmlNode(Node):
+    # Compiled selectors, shared by every page; store modules use a handful of them.
+    _selectors = {}
+
+    def __init__(self, element):
+        self._element = element
+
+    @classmethod
+    def _compiled(cls, selector):
+        compiled = cls._selectors.get(selector)
+        if compiled is None:
+            compiled = cls._selectors[selector] = CSSSelector(selector, translator='html')
+        return compiled
+
+    def select(self, selector):
+        return [LxmlNode(element) for element in self._compiled(selector)(self._element)]
+
+    def text(self, strip=False):
+        # XPath text() skips comments, as BeautifulSoup's get_text does.
+        pieces = self._element.xpath('.//text()')
+        if strip:
+            return ''.join(piece.strip() for piece in pieces)
+        return ''.join(pieces)
+
+    def own_texts(self):
+        texts = [self._element.text] + [child.tail for child in self._element]
+        return [text for text in texts if text]
+
+    def attr(self, name):
+        return self._element.get(name)
+
+    def remove(self, selector):
+        for element in self._compiled(selector)(self._element):
+            # drop_tree keeps the element's tail text, like decompose().
+            element.drop_tree()
+
+
+def _class_matches(class_):
+    """BeautifulSoup's class_ rule: one class name matches any of an element's classes, a string
+    with spaces has to be the whole class attribute."""
+    if ' ' in class_:
+        return lambda value: value == class_
+    return lambda value: value is not None and class_ in value.split()
+
+
+class SoupBackend:
+    def __init__(self, builder):
+        self.builder = builder
+
+    def parse(self, html_content):
+        return SoupNode(BeautifulSoup(html_content, self.builder))
+
+    def cards(self, html_content, name, class_, selector=None):
+        # Only the card elements are built into the tree. The strainer sees the raw class attribute,
+        # so a plain class_ string would miss cards that carry further classes.
+        strainer = SoupStrainer(name, class_=_class_matches(class_))
+        soup = BeautifulSoup(html_content, self.builder, parse_only=strainer)
+        tags = soup.select(selector) if selector else soup.find_all(name, class_=class_)
+        return [SoupNode(tag) for tag in tags]
+
+
+class LxmlBackend:
+    def parse(self, html_content):
+        if not html_content or not html_content.strip():
+            html_content = '<html></html>'
+        try:
+            return LxmlNode(lxml.html.document_fromstring(html_content))
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration.
+            return LxmlNode(lxml.html.document_fromstring(html_content.encode('utf-8')))
+
+    def cards(self, html_content, name, class_, selector=None):
+        root = self.parse(html_content)
+        matches = _class_matches(class_)
+        if selector:
+            # The selector is matched among the card elements, as with the strained soup.
+            return [node for node in root.select(selector)
+                    if node._element.tag == name and matches(node._element.get('class'))]
+        return [LxmlNode(element) for element in root._element.iter(name) if matches(element.get('class'))]
+
+
+BACKENDS = {"html.parser": SoupBackend("html.parser")}
+if HAVE_LXML:
+    BACKENDS["lxml"] = SoupBackend("lxml")
+if HAVE_LXML_HTML:
+    BACKENDS["lxml.html"] = LxmlBackend()
+
+DEFAULT_BACKEND = "lxml.html" if HAVE_LXML_HTML else "lxml" if HAVE_LXML else "html.parser"
+
+_backend = os.getenv('SCRAPER_HTML_PARSER', DEFAULT_BACKEND)
+
+
+def set_backend(name):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable HTML parser backend: {name}")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+def parse(html_content):
+    """Parse a whole page with the configured backend and return its root Node."""
+    return BACKENDS[_backend].parse(html_content)
+
+
+def product_cards(html_content, name, class_):
+    """The product card elements (`name` with class `class_`) of a listing page."""
+    return BACKENDS[_backend].cards(html_content, name, class_)
+
+
+def select_cards(html_content, name, class_, selector):
+    """Like product_cards, for stores whose cards are matched with a CSS selector."""
+    return BACKENDS[_backend].cards(html_content, name, class_, selector)
@@ -0,0 +1,168 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Point this at a mounted volume to keep validators and parsed pages between job executions. The
+# scraper image sets it to /mnt/http-cache, where the Cloud Run Job mounts a Cloud Storage bucket;
+# the temp directory default only helps repeated local runs.
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'scraper_http_cache'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+
+try:
+    import brotli  # noqa: F401  urllib3 decodes "br" responses when this is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class FetchError(Exception):
+    """A page could not be fetched; the store's scrape fails instead of ending early."""
+
+
+def get_session():
+    """One keep-alive session shared by every requests-based scraper."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING})
+            _session = session
+        return _session
+
+
+class FetchResult:
+    def __init__(self, url, status_code, content, encoding, not_modified=False, entry=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.not_modified = not_modified
+        self.entry = entry
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+
+class ResponseCache:
+    """On-disk store of validators, bodies and parse results, keyed by URL."""
+
+    def __init__(self, directory=HTTP_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.body")
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry["content"] = f.read()
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def store(self, url, response):
+        return self.store_body(url, response.content, response.encoding,
+                               response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def store_body(self, url, content, encoding, etag, last_modified):
+        meta_path, body_path = self._paths(url)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+        }
+        self._write(body_path, content)
+        self._write(meta_path, json.dumps(entry).encode())
+        return entry
+
+    def store_parsed(self, url, entry, parsed, version=None):
+        meta_path, _ = self._paths(url)
+        entry = {key: value for key, value in entry.items() if key != "content"}
+        entry["parsed"] = parsed
+        entry["parse_version"] = version
+        self._write(meta_path, json.dumps(entry).encode())
+
+    def _write(self, path, data):
+        # Write-then-rename so a concurrent reader never sees a half-written file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def fetch(url):
+    """GET `url`, revalidating a cached copy with If-None-Match / If-Modified-Since."""
+    cache = get_cache()
+    entry = cache.get(url)
+
+    response = get_session().get(url, headers=conditional_headers(entry), timeout=HTTP_TIMEOUT)
+
+    if response.status_code == 304 and entry:
+        return FetchResult(url, 200, entry["content"], entry.get("encoding"), not_modified=True, entry=entry)
+
+    if response.ok and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+        entry = cache.store(url, response)
+    else:
+        entry = None
+    return FetchResult(url, response.status_code, response.content, response.encoding, entry=entry)
+
+
+def fetch_parsed(url, parse, version=None):
+    """Return parse(html) for `url`, reusing the stored result when the server answers 304.
+
+    parse() must return something JSON-serialisable. A stored result is only reused if it was
+    produced by the same parser `version`. Raises FetchError for any status but 200, so an error
+    page is never parsed as an empty listing.
+    """
+    result = fetch(url)
+    if result.status_code != 200:
+        raise FetchError(f"HTTP {result.status_code} for {url}")
+    if result.not_modified and "parsed" in result.entry and result.entry.get("parse_version") == version:
+        print(f"Not modified, reusing parsed page: {url}")
+        return result.entry["parsed"]
+
+    parsed = parse(result.text)
+    if result.entry is not None:
+        get_cache().store_parsed(url, result.entry, parsed, version)
+    return parsed
@@ -0,0 +1,193 @@
+import os
+import re
+import hashlib
+import unicodedata
+from collections import defaultdict
+
+from handle_db_connections import create_conn
+
+# How far apart two offers' flight numbers may be and still be the same disc. Stores round turn
+# and fade differently (-1 vs -1.5), and a missing rating agrees with anything.
+MATCH_FLIGHT_TOLERANCE = float(os.getenv('MATCH_FLIGHT_TOLERANCE', 0.5))
+
+# Manufacturer names: the same disc is "Innova Star Destroyer" in one store and "Star Destroyer" in another.
+BRAND_TOKENS = {
+    'innova', 'discraft', 'discmania', 'latitude', '64', 'latitude64', 'dynamic', 'westside',
+    'kastaplast', 'prodigy', 'mvp', 'axiom', 'streamline', 'gateway', 'legacy', 'millennium', 'thought',
+    'space', 'clash', 'lone', 'rpm', 'infinite', 'trilogy', 'alfa', 'yikun', 'prodiscus',
+    'viking', 'salient', 'lucky', 'mint', 'tsa', 'dga', 'elevation', 'loft', 'whamo',
+}
+# Plastic lines, hyphens dropped ("R-Pro" -> "rpro"). "star" is Innova's Star plastic far more
+# often than the Lone Star brand, so it is kept as a plastic token.
+PLASTIC_TOKENS = {
+    'star', 'gstar', 'echo', 'champion', 'dx', 'pro', 'rpro', 'kcpro', 'xt', 'halo', 'metal', 'flake',
+    'blizzard', 'nexus', 'glow', 'color', 'shimmer', 'luster', 'proto',
+    'esp', 'z', 'x', 'jawbreaker', 'big', 'titanium', 'cryztal', 'elite', 'rubber', 'line',
+    'sline', 'cline', 'dline', 'pline', 'gline', 'evolution', 'neo', 'lux', 'vapor', 'exo', 'geo',
+    'meta', 'horizon', 'active', 'premium', 'gold', 'opto', 'optox', 'air', 'moonshine', 'retro',
+    'zero', 'hard', 'medium', 'soft', 'frost', 'burst', 'lucid', 'fuzion', 'classic', 'prime',
+    'biofuzion', 'vip', 'ice', 'eclipse', 'neutron', 'proton', 'plasma', 'fission', 'cosmic', 'electron',
+    'k1', 'k2', 'k3', 'k1soft', 'k3hard', 'base',
+}
+# Words stores add that say nothing about which disc it is, including the Latvian and Finnish ones.
+NOISE_TOKENS = {
+    'disc', 'discs', 'disk', 'disks', 'disku', 'diski', 'kiekko', 'golf', 'frisbee', 'frisbeegolf', 'discgolf',
+    'driver', 'drivers', 'draiveri', 'distance', 'fairway', 'midrange', 'midari', 'approach', 'putter', 'putteri',
+    'first', 'run', 'stamp', 'edition', 'limited', 'le', 'new', 'the', 'and',
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+# Weights are per-listing details: 175, 175g, 170-175, 173-175g.
+WEIGHT_PATTERN = re.compile(r"^\d{3}(-\d{3})?g?$")
+FLIGHT_KEYS = ('speed', 'glide', 'turn', 'fade')
+
+OFFERS_QUERY = "SELECT unique_id, title, speed, glide, turn, fade, canonical_id FROM product_table"
+UPDATE_CANONICAL_SQL = "UPDATE product_table SET canonical_id = %s WHERE unique_id = %s"
+
+# One row per disc: the cheapest offer the grid can show, plus how many there are. The conditions
+# are app/product_query.BASE_CONDITIONS, so offer_count only counts rows the grid would list.
+REFRESH_DISC_OFFERS_SQL = """
+INSERT INTO disc_offers (canonical_id, cheapest_id, offer_count, max_price)
+SELECT canonical_id, unique_id, offer_count, max_price
+FROM (
+    SELECT canonical_id, unique_id,
+           ROW_NUMBER() OVER (PARTITION BY canonical_id ORDER BY price, unique_id) AS offer_rank,
+           COUNT(*) OVER (PARTITION BY canonical_id) AS offer_count,
+           MAX(price) OVER (PARTITION BY canonical_id) AS max_price
+    FROM product_table
+    WHERE canonical_id IS NOT NULL AND missing_since IS NULL
+      AND speed IS NOT NULL AND glide IS NOT NULL AND turn IS NOT NULL AND fade IS NOT NULL
+      AND LOWER(title) NOT LIKE '%karte%'
+) ranked
+WHERE offer_rank = 1
+"""
+
+
+def title_tokens(title):
+    """Lowercase, accent-free word tokens of a title without weights, with hyphens inside words dropped.
+
+    A plastic written as two words is joined up, so "KC Pro" and "KC-Pro" are both "kcpro".
+    """
+    text = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode().lower()
+    words = [word.replace('-', '').replace("'", '')
+             for word in TOKEN_PATTERN.findall(text) if not WEIGHT_PATTERN.match(word)]
+    tokens = []
+    i = 0
+    while i < len(words):
+        if i + 1 < len(words) and words[i] + words[i + 1] in PLASTIC_TOKENS:
+            tokens.append(words[i] + words[i + 1])
+            i += 2
+        else:
+            tokens.append(words[i])
+            i += 1
+    return tokens
+
+
+def disc_signature(title):
+    """(mold, plastic) of a title as sorted, space-joined tokens; the mold is '' when nothing is left."""
+    mold, plastic = set(), set()
+    for token in title_tokens(title):
+        if token in NOISE_TOKENS:
+            continue
+        if token in PLASTIC_TOKENS:
+            plastic.add(token)
+        elif token not in BRAND_TOKENS:
+            mold.add(token)
+    return ' '.join(sorted(mold)), ' '.join(sorted(plastic))
+
+
+def flights_agree(a, b, tolerance=MATCH_FLIGHT_TOLERANCE):
+    return all(x is None or y is None or abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+def _flight(offer):
+    return tuple(None if offer[key] is None else float(offer[key]) for key in FLIGHT_KEYS)
+
+
+def _flight_sort_key(flight):
+    return tuple((value is None, value or 0.0) for value in flight)
+
+
+def _canonical_id(*parts):
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _clusters(offers):
+    """Split offers of one (mold, plastic) block into groups whose flight numbers agree (single link)."""
+    parent = list(range(len(offers)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    flights = [_flight(offer) for offer in offers]
+    for i in range(len(offers)):
+        for j in range(i + 1, len(offers)):
+            if flights_agree(flights[i], flights[j]):
+                parent[find(i)] = find(j)
+
+    groups = defaultdict(list)
+    for i, offer in enumerate(offers):
+        groups[find(i)].append((flights[i], offer))
+    return list(groups.values())
+
+
+def match_offers(offers):
+    """unique_id -> canonical_id for offers with title, speed, glide, turn and fade.
+
+    Offers are blocked on their (mold, plastic) signature, so only offers with the same tokens are
+    ever compared. Inside a block, offers whose flight numbers agree are the same disc. A block that
+    is one disc gets an id from the signature alone, so it survives offers coming and going; a block
+    that splits is told apart by the lowest flight numbers in each part. Titles with no mold tokens
+    stay a disc of their own.
+    """
+    blocks = defaultdict(list)
+    canonical = {}
+    for offer in offers:
+        mold, plastic = disc_signature(offer['title'])
+        if mold:
+            blocks[(mold, plastic)].append(offer)
+        else:
+            canonical[offer['unique_id']] = offer['unique_id']
+
+    for (mold, plastic), block in blocks.items():
+        clusters = _clusters(block)
+        for cluster in clusters:
+            if len(clusters) == 1:
+                canonical_id = _canonical_id(mold, plastic)
+            else:
+                flight = min((flight for flight, _ in cluster), key=_flight_sort_key)
+                canonical_id = _canonical_id(mold, plastic, *flight)
+            for _, offer in cluster:
+                canonical[offer['unique_id']] = canonical_id
+    return canonical
+
+
+def assign_canonical_ids():
+    """Match every product in product_table and rebuild disc_offers. Returns how many products moved to another disc."""
+    connection = create_conn()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(OFFERS_QUERY)
+            rows = cursor.fetchall()
+        offers = [dict(zip(('unique_id', 'title') + FLIGHT_KEYS + ('canonical_id',), row)) for row in rows]
+        canonical = match_offers(offers)
+        changed = [(canonical[offer['unique_id']], offer['unique_id'])
+                   for offer in offers if offer['canonical_id'] != canonical[offer['unique_id']]]
+
+        # Readers see the old disc_offers until the commit.
+        with connection.cursor() as cursor:
+            for start in range(0, len(changed), 500):
+                cursor.executemany(UPDATE_CANONICAL_SQL, changed[start:start + 500])
+            cursor.execute("DELETE FROM disc_offers")
+            cursor.execute(REFRESH_DISC_OFFERS_SQL)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    print(f"Matched {len(offers)} products into {len(set(canonical.values()))} discs, {len(changed)} relinked.")
+    return len(changed)
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Global cap on scraper jobs running at the same time.
+SCRAPER_MAX_WORKERS = int(os.getenv('SCRAPER_MAX_WORKERS', 4))
+# Default number of jobs (or fan-out requests) allowed against one store at a time.
+SCRAPER_STORE_CONCURRENCY = int(os.getenv('SCRAPER_STORE_CONCURRENCY', 1))
+
+_store_limits = {}
+_store_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+class StoreJob:
+    def __init__(self, store, name, func, *args):
+        self.store = store
+        self.name = name
+        self.func = func
+        self.args = args
+
+def set_store_concurrency(store, limit):
+    with _semaphores_lock:
+        _store_limits[store] = limit
+        _store_semaphores.pop(store, None)
+
+def _get_semaphore(store):
+    with _semaphores_lock:
+        semaphore = _store_semaphores.get(store)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(_store_limits.get(store, SCRAPER_STORE_CONCURRENCY))
+            _store_semaphores[store] = semaphore
+        return semaphore
+
+@contextmanager
+def store_slot(store):
+    """Hold one of the store's concurrency slots for the duration of the block."""
+    semaphore = _get_semaphore(store)
+    with semaphore:
+        yield
+
+def _run_job(job):
+    started = time.monotonic()
+    result = {"store": job.store, "job": job.name, "status": "ok", "error": None}
+    try:
+        with store_slot(job.store):
+            job.func(*job.args)
+    except Exception as e:
+        # One broken store must not abort the others.
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.monotonic() - started
+    print(f"[{job.store}] {job.name} {result['status']} in {result['seconds']:.1f}s"
+          + (f": {result['error']}" if result["error"] else ""))
+    return result
+
+def run_jobs(jobs, max_workers=SCRAPER_MAX_WORKERS):
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scraper") as executor:
+        results = list(executor.map(_run_job, jobs))
+    print_report(results, time.monotonic() - started)
+    return results
+
+def print_report(results, wall_seconds):
+    print("Scrape summary:")
+    per_store = {}
+    for result in results:
+        per_store.setdefault(result["store"], []).append(result)
+    for store, store_results in sorted(per_store.items()):
+        busy = sum(r["seconds"] for r in store_results)
+        failed = [r for r in store_results if r["status"] != "ok"]
+        print(f"  {store}: {len(store_results) - len(failed)}/{len(store_results)} jobs ok, {busy:.1f}s total")
+        for r in failed:
+            print(f"    {r['job']} failed: {r['error']}")
+    print(f"  wall clock: {wall_seconds:.1f}s, sum of jobs: {sum(r['seconds'] for r in results):.1f}s")
@@ -0,0 +1,128 @@
+"""Compare HTML parser backends, and time the normalisation stages, on saved store pages.
+
+    python -m scrape_stores.parser_benchmark --save     # capture one page per store
+    python -m scrape_stores.parser_benchmark            # time every backend on them
+    python -m scrape_stores.parser_benchmark --stages   # also time each pipeline stage
+
+Run from batch_jobs/scraper_job. Fixtures are written to PARSER_FIXTURE_DIR as <store>.html.
+"""
+import os
+import sys
+import time
+import argparse
+
+from scrape_stores import html_parser
+from scrape_stores.pipeline import STAGES
+from scrape_stores.bulk_page_stucture.discking_scrape import DiscKingAdapter
+from scrape_stores.bulk_page_stucture.par3_scrape import Par3Adapter
+from scrape_stores.bulk_page_stucture.innovaeurope_scrape import InnovaEuropeAdapter
+from scrape_stores.bulk_page_stucture.diskiundiski_scrape import DiskiundiskiAdapter
+from scrape_stores.bulk_page_stucture.powergrip_scrape import PowergripAdapter
+from scrape_stores.single_page_structure.latitude64_scrape import Latitude64Adapter
+
+PARSER_FIXTURE_DIR = os.getenv('PARSER_FIXTURE_DIR', os.path.join(os.path.dirname(__file__), 'fixtures'))
+
+ADAPTERS = [
+    DiskiundiskiAdapter(),
+    InnovaEuropeAdapter(["putters"]),
+    Par3Adapter(),
+    Latitude64Adapter(),
+    DiscKingAdapter(),
+    PowergripAdapter(),
+]
+
+
+def save_fixtures(directory):
+    from scrape_stores.http_client import fetch
+    from scrape_stores.browser_pool import get_browser_pool, close_browser_pool
+
+    os.makedirs(directory, exist_ok=True)
+    try:
+        for adapter in ADAPTERS:
+            url = adapter.fixture_url()
+            if adapter.wait_selector:
+                html = get_browser_pool().render(url, adapter.wait_selector)
+            else:
+                html = fetch(url).text
+            with open(os.path.join(directory, f"{adapter.store}.html"), 'w', encoding='utf-8') as f:
+                f.write(html)
+            print(f"Saved {adapter.store}: {len(html)} characters")
+    finally:
+        close_browser_pool()
+
+
+def load_fixture(directory, adapter):
+    path = os.path.join(directory, f"{adapter.store}.html")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def benchmark_backends(directory, repeat):
+    # Only the backends whose libraries are installed are listed.
+    backends = list(html_parser.BACKENDS)
+    print(f"{'store':<18}" + "".join(f"{backend:>16}" for backend in backends) + f"{'cards':>10}")
+
+    for adapter in ADAPTERS:
+        html = load_fixture(directory, adapter)
+        if html is None:
+            print(f"{adapter.store:<18}no fixture")
+            continue
+
+        timings = []
+        results = {}
+        for backend in backends:
+            html_parser.set_backend(backend)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                products = adapter.raw_products(html)
+            timings.append((time.perf_counter() - started) / repeat * 1000)
+            results[backend] = products
+
+        counts = {len(products) for products in results.values()}
+        line = f"{adapter.store:<18}" + "".join(f"{ms:>14.1f}ms" for ms in timings) + f"{max(counts):>10}"
+        if len(counts) > 1 or len({repr(products) for products in results.values()}) > 1:
+            line += "  (backends disagree)"
+        print(line)
+
+
+def benchmark_stages(directory, repeat):
+    print()
+    print(f"{'store':<18}" + "".join(f"{stage.__name__:>24}" for stage in STAGES))
+
+    for adapter in ADAPTERS:
+        html = load_fixture(directory, adapter)
+        if html is None:
+            continue
+        raws = adapter.raw_products(html)
+
+        timings = [0.0] * len(STAGES)
+        for _ in range(repeat):
+            products = [dict(raw, store=adapter.store) for raw in raws]
+            for index, stage in enumerate(STAGES):
+                started = time.perf_counter()
+                products = [product for product in (stage(product, adapter) for product in products)
+                            if product is not None]
+                timings[index] += time.perf_counter() - started
+
+        print(f"{adapter.store:<18}" + "".join(f"{seconds / repeat * 1000:>22.3f}ms" for seconds in timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', action='store_true', help="fetch and save one page per store first")
+    parser.add_argument('--stages', action='store_true', help="also time each normalisation stage")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--dir', default=PARSER_FIXTURE_DIR)
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixtures(args.dir)
+    benchmark_backends(args.dir, args.repeat)
+    if args.stages:
+        benchmark_stages(args.dir, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
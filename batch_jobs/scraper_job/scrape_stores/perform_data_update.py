@@ -1,17 +1,77 @@
-from scrape_stores.bulk_page_stucture.discking_scrape import get_data_discking
-from scrape_stores.bulk_page_stucture.par3_scrape import get_data_par3
-from scrape_stores.bulk_page_stucture.innovaeurope_scrape import get_data_discsport
-from scrape_stores.bulk_page_stucture.diskiundiski_scrape import get_data_diskiundiskicesis
-from scrape_stores.bulk_page_stucture.powergrip_scrape import get_data_powergrip_from_bulk
-#from scrape_stores.single_page_structure.latitude64_scrape import run_latitude64_scraper
+from scrape_stores.bulk_page_stucture.discking_scrape import DiscKingAdapter
+from scrape_stores.bulk_page_stucture.par3_scrape import Par3Adapter
+from scrape_stores.bulk_page_stucture.innovaeurope_scrape import InnovaEuropeAdapter
+from scrape_stores.bulk_page_stucture.diskiundiski_scrape import DiskiundiskiAdapter
+from scrape_stores.bulk_page_stucture.powergrip_scrape import PowergripAdapter
+from scrape_stores.single_page_structure.latitude64_scrape import Latitude64Adapter
+from scrape_stores.orchestrator import StoreJob, run_jobs, set_store_concurrency
+from scrape_stores.browser_pool import close_browser_pool
+from scrape_stores.product_sink import use_sink
+from scrape_stores.change_detection import DigestMap, mark_disappeared
+from scrape_stores.matching import assign_canonical_ids
+from scrape_stores.price_history import PriceRecorder
+from handle_credentials import prefetch_secrets
+from handle_db_connections import DB_SECRET_NAMES, create_conn
 
 
-def run_all_scrapers():
-    get_data_diskiundiskicesis() 
-    get_data_discking() 
-    get_data_discsport() 
-    get_data_par3() 
-    get_data_powergrip_from_bulk() 
-    #run_latitude64_scraper()   Currently not working
+def publish_catalog_version():
+    # Lets the app's in-process catalog snapshot know that product_table changed.
+    connection = create_conn()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+            INSERT INTO catalog_meta (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1;
+            """)
+            connection.commit()
+    finally:
+        connection.close()
+
+
+def adapter_job(adapter, sink, name="all"):
+    return StoreJob(adapter.store, name, adapter.run, sink)
+
+
+def build_jobs(sink):
+    # innovaeurope.com serves each category from one large page, so its categories run as separate jobs.
+    set_store_concurrency("innovaeurope.com", 2)
+    return [
+        adapter_job(DiskiundiskiAdapter(), sink),
+        adapter_job(DiscKingAdapter(), sink),
+        adapter_job(InnovaEuropeAdapter(["putters"]), sink, "putters"),
+        adapter_job(InnovaEuropeAdapter(["midrange"]), sink, "midrange"),
+        adapter_job(InnovaEuropeAdapter(["distance-drivers"]), sink, "distance-drivers"),
+        adapter_job(Par3Adapter(), sink),
+        adapter_job(PowergripAdapter(), sink),
+        adapter_job(Latitude64Adapter(), sink),
+    ]
 
 
+def completed_stores(results):
+    stores = set(result["store"] for result in results)
+    return [store for store in stores
+            if all(result["status"] == "ok" for result in results if result["store"] == store)]
+
+
+def run_all_scrapers():
+    prefetch_secrets(DB_SECRET_NAMES)
+    digests = DigestMap.load()
+    prices = PriceRecorder.load()
+    try:
+        # Every store streams into one sink that writes batched upserts over a single connection.
+        # Products whose content fingerprint did not change since the last run are not written,
+        # and only changed prices add to the price history.
+        with use_sink(digests=digests, prices=prices) as sink:
+            results = run_jobs(build_jobs(sink))
+    finally:
+        # Both Playwright stores render through one shared Chromium for the whole run.
+        close_browser_pool()
+
+    missing = mark_disappeared(digests, completed_stores(results))
+    print(f"Catalog diff: {digests.inserted} inserted, {digests.updated} updated, "
+          f"{digests.unchanged} unchanged, {missing} missing, {prices.changed} price changes.")
+    # Matching is cross-store, so it runs once over the whole table after every store is done.
+    relinked = assign_canonical_ids()
+    if digests.inserted or digests.updated or missing or relinked:
+        publish_catalog_version()
+    return results
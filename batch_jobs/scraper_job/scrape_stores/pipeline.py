@@ -0,0 +1,130 @@
+import math
+import hashlib
+from urllib.parse import urljoin
+
+FLIGHT_RATING_KEYS = ("Speed", "Glide", "Turn", "Fade")
+
+
+# Each stage takes the product being built and its store's adapter, and returns the product or
+# None to drop it. Stages are plain functions so they can be timed one by one
+# (see parser_benchmark.py --stages).
+
+def parse_price(product, adapter):
+    """Split the scraped price text into an amount and a currency symbol."""
+    text = str(product['price']).replace(' ', '')
+    numeric_value = ''.join(char for char in text if char.isdigit() or char in ',.')
+    try:
+        product['price'] = float(numeric_value.replace(',', '.'))
+    except ValueError:
+        return None
+
+    if adapter.currency is not None:
+        product['currency'] = adapter.currency
+    else:
+        currency_symbol = ''.join(char for char in text if not char.isdigit() and char not in ',.')
+        for old, new in adapter.currency_replacements:
+            currency_symbol = currency_symbol.replace(old, new)
+        product['currency'] = currency_symbol.strip()
+    return product
+
+
+def clean_flight_ratings(product, adapter):
+    """Turn every rating into a float, with blanks and unreadable values as None."""
+    raw = product.get('flight_ratings') or {}
+    ratings = {}
+    for key in FLIGHT_RATING_KEYS:
+        value = raw.get(key)
+        if isinstance(value, str):
+            value = value.strip().replace(',', '.')
+        try:
+            ratings[key] = float(value) if value not in (None, '') else None
+        except ValueError:
+            print(f"Failed to convert '{value}' for {key}")
+            ratings[key] = None
+    product['flight_ratings'] = ratings
+    return product
+
+
+def require_flight_ratings(product, adapter):
+    """Drop non-disc products, as configured per store by adapter.require_ratings."""
+    values = product['flight_ratings'].values()
+    if adapter.require_ratings == "any" and all(value is None for value in values):
+        print(f"Skipping non-disc product: {product['title']}")
+        return None
+    if adapter.require_ratings == "all" and any(value is None for value in values):
+        return None
+    return product
+
+
+def resolve_urls(product, adapter):
+    for key in ('link_to_disc', 'image_url'):
+        value = product.get(key)
+        product[key] = urljoin(adapter.base_url, value) if value else None
+    return product
+
+
+def validate(product, adapter):
+    if not product['title'] or not math.isfinite(product['price']):
+        return None
+    return product
+
+
+def assign_unique_id(product, adapter):
+    # Must stay byte-for-byte what the scrapers have always used; it is product_table's primary key.
+    combined = f"{product['title']}_{product['store']}"
+    combined = combined.lower().replace(' ', '')
+    product['unique_id'] = hashlib.sha256(combined.encode()).hexdigest()
+    return product
+
+
+STAGES = (
+    parse_price,
+    clean_flight_ratings,
+    require_flight_ratings,
+    resolve_urls,
+    validate,
+    assign_unique_id,
+)
+
+
+def normalise(raw, adapter, stages=STAGES):
+    """Run one scraped card through the stages. Returns the product dict, or None if it was dropped."""
+    product = dict(raw)
+    product['store'] = adapter.store
+    for stage in stages:
+        product = stage(product, adapter)
+        if product is None:
+            return None
+    return product
+
+
+class ProductPipeline:
+    """Normalises one store's raw cards and streams the results into the shared sink.
+
+    Cards that repeat a unique_id already seen in this run are dropped.
+    """
+
+    def __init__(self, adapter, sink, stages=STAGES):
+        self.adapter = adapter
+        self.sink = sink
+        self.stages = stages
+        self.seen_ids = set()
+        self.added = 0
+        self.dropped = 0
+
+    def add(self, raw):
+        try:
+            product = normalise(raw, self.adapter, self.stages)
+        except Exception as e:
+            print(f"[{self.adapter.store}] Error normalising product: {e}")
+            product = None
+        if product is None or product['unique_id'] in self.seen_ids:
+            self.dropped += 1
+            return
+        self.seen_ids.add(product['unique_id'])
+        self.sink.add(product)
+        self.added += 1
+
+    def add_many(self, raws):
+        for raw in raws:
+            self.add(raw)
@@ -0,0 +1,71 @@
+import threading
+from decimal import Decimal
+from datetime import datetime, timezone
+
+from handle_db_connections import create_conn
+
+OBSERVATION_SQL = """
+INSERT INTO price_observations (unique_id, observed_at, price) VALUES (%s, %s, %s)
+ON DUPLICATE KEY UPDATE price = VALUES(price)
+"""
+# The price before the change was in effect earlier that day, so it counts towards the day's range.
+DAILY_SQL = """
+INSERT INTO price_daily (unique_id, day, min_price, max_price, close_price) VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+min_price = LEAST(min_price, VALUES(min_price)),
+max_price = GREATEST(max_price, VALUES(max_price)),
+close_price = VALUES(close_price)
+"""
+
+
+def _cents(value):
+    # Compared the way DECIMAL(10, 2) stores it.
+    return Decimal(f"{float(value):.2f}")
+
+
+class PriceRecorder:
+    """unique_id -> last recorded price, used to keep one observation per price change.
+
+    Every observation of a run shares the run's start time, so re-running a scrape can only
+    overwrite its own rows. Safe to share between scraper threads.
+    """
+
+    def __init__(self, prices, observed_at=None):
+        self._prices = prices
+        self._lock = threading.Lock()
+        self.observed_at = observed_at or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.changed = 0
+
+    @classmethod
+    def load(cls):
+        connection = create_conn()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT unique_id, price FROM product_table WHERE price IS NOT NULL")
+                rows = cursor.fetchall()
+        finally:
+            connection.close()
+        return cls({unique_id: _cents(price) for unique_id, price in rows})
+
+    def observe(self, product):
+        """Return the product's price change as (unique_id, price, previous price), or None if unchanged."""
+        unique_id = product['unique_id']
+        price = _cents(product['price'])
+        with self._lock:
+            previous = self._prices.get(unique_id)
+            if previous == price:
+                return None
+            self._prices[unique_id] = price
+            self.changed += 1
+        return unique_id, price, previous
+
+    def write(self, cursor, changes):
+        """Write observation and daily rollup rows for changes returned by observe()."""
+        day = self.observed_at.date()
+        observations, daily = [], []
+        for unique_id, price, previous in changes:
+            low, high = sorted((price, price if previous is None else previous))
+            observations.append((unique_id, self.observed_at, price))
+            daily.append((unique_id, day, low, high, price))
+        cursor.executemany(OBSERVATION_SQL, observations)
+        cursor.executemany(DAILY_SQL, daily)
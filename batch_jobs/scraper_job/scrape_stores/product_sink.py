@@ -0,0 +1,150 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import pymysql
+
+from handle_db_connections import create_conn
+from scrape_stores.change_detection import fingerprint
+
+# Products buffered before one multi-row upsert and commit.
+PRODUCT_SINK_BATCH_SIZE = int(os.getenv('PRODUCT_SINK_BATCH_SIZE', 200))
+
+UPSERT_SQL = """
+INSERT INTO product_table (unique_id, title, price, currency, speed, glide, turn, fade, link_to_disc, image_url, store, content_hash)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+price = VALUES(price),
+currency = VALUES(currency),
+speed = VALUES(speed),
+glide = VALUES(glide),
+turn = VALUES(turn),
+fade = VALUES(fade),
+link_to_disc = VALUES(link_to_disc),
+image_url = VALUES(image_url),
+content_hash = VALUES(content_hash),
+missing_since = NULL
+"""
+
+
+def product_row(product, content_hash):
+    return (
+        product['unique_id'],
+        product['title'],
+        product['price'],
+        product['currency'],
+        product['flight_ratings']['Speed'],
+        product['flight_ratings']['Glide'],
+        product['flight_ratings']['Turn'],
+        product['flight_ratings']['Fade'],
+        product['link_to_disc'],
+        product['image_url'],
+        product['store'],
+        content_hash
+    )
+
+
+class ProductSink:
+    """Buffers scraped products and writes them as batched upserts over one connection.
+
+    With a DigestMap, products whose fingerprint matches the stored content_hash are skipped.
+    With a PriceRecorder, price changes are written to the price history in the same transaction
+    as the product rows. Safe to share between scraper threads. close() flushes whatever is still
+    buffered.
+    """
+
+    def __init__(self, batch_size=PRODUCT_SINK_BATCH_SIZE, digests=None, prices=None):
+        self.batch_size = batch_size
+        self.digests = digests
+        self.prices = prices
+        self.written = 0
+        self._buffer = []
+        self._price_changes = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._connection = None
+
+    def add(self, product):
+        content_hash = fingerprint(product)
+        if self.digests is not None and not self.digests.check(product, content_hash):
+            return
+        row = product_row(product, content_hash)
+        price_change = self.prices.observe(product) if self.prices is not None else None
+        with self._buffer_lock:
+            self._buffer.append(row)
+            if price_change is not None:
+                self._price_changes.append(price_change)
+            if len(self._buffer) < self.batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+            price_changes, self._price_changes = self._price_changes, []
+        self._write(batch, price_changes)
+
+    def add_many(self, products):
+        for product in products:
+            self.add(product)
+
+    def flush(self):
+        with self._buffer_lock:
+            batch, self._buffer = self._buffer, []
+            price_changes, self._price_changes = self._price_changes, []
+        if batch:
+            self._write(batch, price_changes)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+
+    def _write(self, rows, price_changes=()):
+        with self._write_lock:
+            try:
+                self._upsert(rows, price_changes)
+            except pymysql.err.OperationalError as e:
+                # The long-lived connection may have been dropped; retry once on a fresh one.
+                print(f"Product sink reconnecting after: {e}")
+                self._reset_connection()
+                self._upsert(rows, price_changes)
+            self.written += len(rows)
+
+    def _upsert(self, rows, price_changes):
+        if self._connection is None:
+            self._connection = create_conn()
+        try:
+            with self._connection.cursor() as cursor:
+                # pymysql folds executemany on INSERT ... VALUES into multi-row statements.
+                cursor.executemany(UPSERT_SQL, rows)
+                if price_changes:
+                    self.prices.write(cursor, price_changes)
+            self._connection.commit()
+        except Exception:
+            try:
+                self._connection.rollback()
+            except Exception:
+                pass
+            raise
+
+    def _reset_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+@contextmanager
+def use_sink(sink=None, digests=None, prices=None):
+    """Yield the given sink, or a private one that is flushed and closed afterwards."""
+    if sink is not None:
+        yield sink
+        return
+    sink = ProductSink(digests=digests, prices=prices)
+    try:
+        yield sink
+    finally:
+        sink.close()
@@ -0,0 +1,185 @@
+import itertools
+from xml.etree import ElementTree as ET
+
+from scrape_stores.html_parser import parse, product_cards, select_cards
+from scrape_stores.http_client import FetchError, fetch, fetch_parsed
+from scrape_stores.pipeline import ProductPipeline
+
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+class StoreAdapter:
+    """What the scrape job needs to know about one store.
+
+    A store module subclasses one of the listing strategies below, sets the class attributes and
+    implements map_card(). Price parsing, rating cleanup, URL resolution, unique_id and writing are
+    done for every store by the pipeline in pipeline.py.
+    """
+
+    store = None
+    # Relative links and image paths are resolved against this.
+    base_url = None
+    # Product cards are the `card_name` elements with class `card_class`, optionally narrowed
+    # further by the CSS `card_selector`.
+    card_name = 'div'
+    card_class = None
+    card_selector = None
+    # Fixed currency for stores whose price text has none; otherwise taken from the price text.
+    currency = None
+    currency_replacements = ()
+    # None, "any" or "all": which flight ratings a card needs to count as a disc.
+    require_ratings = None
+    # Selector to wait for when the page has to be rendered in the browser.
+    wait_selector = None
+    # Bump when map_card changes so cached parse results from older code are not reused.
+    parse_version = 1
+
+    def map_card(self, card):
+        """Raw fields of one card: title, price (the price text), flight_ratings, link_to_disc, image_url."""
+        raise NotImplementedError
+
+    def scrape(self, pipeline):
+        raise NotImplementedError
+
+    def fixture_url(self):
+        """A representative page, used by parser_benchmark.py."""
+        raise NotImplementedError
+
+    @property
+    def cache_version(self):
+        return f"{type(self).__name__}:{self.parse_version}"
+
+    def cards(self, html_content):
+        if self.card_selector:
+            return select_cards(html_content, self.card_name, self.card_class, self.card_selector)
+        return product_cards(html_content, self.card_name, self.card_class)
+
+    def map_cards(self, cards):
+        products = []
+        for card in cards:
+            try:
+                raw = self.map_card(card)
+            except Exception as e:
+                # One malformed card must not cost the rest of the page.
+                print(f"[{self.store}] Error parsing product card: {e}")
+                continue
+            if raw is not None:
+                products.append(raw)
+        return products
+
+    def parse_page(self, html_content):
+        """JSON-serialisable result for one listing page: {"products": [raw cards], "last_page": bool}."""
+        return {"products": self.map_cards(self.cards(html_content)), "last_page": False}
+
+    def raw_products(self, html_content):
+        return self.parse_page(html_content)["products"]
+
+    def run(self, sink):
+        pipeline = ProductPipeline(self, sink)
+        self.scrape(pipeline)
+        print(f"[{self.store}] {pipeline.added} products passed on, {pipeline.dropped} dropped")
+
+
+class HttpListingAdapter(StoreAdapter):
+    """Listing pages fetched over HTTP with conditional requests.
+
+    Pages come from listing_urls(), by default page_url(1), page_url(2), ...; the scrape stops at
+    the first page without products (unless stop_when_empty is False) or one marked as last.
+    """
+
+    stop_when_empty = True
+
+    def page_url(self, page_number):
+        raise NotImplementedError
+
+    def listing_urls(self):
+        for page_number in itertools.count(1):
+            yield self.page_url(page_number)
+
+    def fixture_url(self):
+        return next(iter(self.listing_urls()))
+
+    def scrape(self, pipeline):
+        for page_url in self.listing_urls():
+            print(f"getting {self.store} page")
+            # Unchanged pages come back as the stored parse result without being parsed again.
+            page = fetch_parsed(page_url, self.parse_page, self.cache_version)
+            if not page["products"] and self.stop_when_empty:
+                break
+            pipeline.add_many(page["products"])
+            if page["last_page"]:
+                break
+
+
+class RenderedListingAdapter(StoreAdapter):
+    """Listing pages rendered in the shared browser, pages_per_round tabs at a time, until one is empty."""
+
+    pages_per_round = 4
+
+    def page_url(self, page_number):
+        raise NotImplementedError
+
+    def fixture_url(self):
+        return self.page_url(1)
+
+    def scrape(self, pipeline):
+        from scrape_stores.browser_pool import get_browser_pool
+
+        browser_pool = get_browser_pool()
+        for first_page in itertools.count(1, self.pages_per_round):
+            page_numbers = range(first_page, first_page + self.pages_per_round)
+            print(f"getting {self.store} pages {page_numbers.start}-{page_numbers.stop - 1}")
+            rendered_pages = browser_pool.render_many([self.page_url(n) for n in page_numbers], self.wait_selector)
+            for page_number, html_content in zip(page_numbers, rendered_pages):
+                products = self.raw_products(html_content)
+                if not products:
+                    # Cards that were merely slow to render must not end the listing early, so an
+                    # empty page is rendered once more on its own before it counts as the end.
+                    products = self.raw_products(browser_pool.render(self.page_url(page_number), self.wait_selector))
+                if not products:
+                    print(f"No products found on page {page_number}. Scraping finished.")
+                    return
+                pipeline.add_many(products)
+
+
+class SitemapAdapter(StoreAdapter):
+    """One product per page, with product URLs read from the store's sitemap and fetched concurrently.
+
+    map_card() receives the parsed product page.
+    """
+
+    sitemap_url = None
+
+    def product_urls(self):
+        response = fetch(self.sitemap_url)
+        if response.status_code != 200:
+            raise FetchError(f"Failed to retrieve sitemap: HTTP {response.status_code}")
+        sitemap_xml = ET.fromstring(response.content)
+        urls = [url_elem.text for url_elem in sitemap_xml.findall(f'.//{SITEMAP_NAMESPACE}loc')]
+        return [url for url in urls if url.rstrip('/') != self.base_url.rstrip('/')]
+
+    def fixture_url(self):
+        return self.product_urls()[0]
+
+    def parse_product_page(self, html_content, page_url):
+        for raw in self.map_cards([parse(html_content)]):
+            raw['link_to_disc'] = page_url
+            return raw
+        return None
+
+    def raw_products(self, html_content):
+        raw = self.parse_product_page(html_content, self.base_url)
+        return [raw] if raw is not None else []
+
+    def scrape(self, pipeline):
+        from scrape_stores.async_http import fetch_all
+
+        urls = self.product_urls()
+        print(f"getting {len(urls)} {self.store} pages")
+
+        def handle_product(raw):
+            if raw is not None:
+                pipeline.add(raw)
+
+        # Pages are fetched concurrently under a per-host rate limit.
+        fetch_all(urls, self.parse_product_page, handle_product, version=self.cache_version)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scraper runs with scraper_job/ on the path (see run_scraper.py); the tests do the same.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from scrape_stores import http_client
+
+ETAG = '"v1"'
+PAGE = b"<html><body><div class='card'>one</div></body></html>"
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    """Serves PAGE with an ETag and answers 304 to a matching If-None-Match."""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(dict(self.headers))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ListingHandler.requests_seen = []
+    httpd = HTTPServer(("127.0.0.1", 0), ListingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def response_cache(tmp_path, monkeypatch):
+    cache = http_client.ResponseCache(directory=str(tmp_path))
+    monkeypatch.setattr(http_client, "_cache", cache)
+    return cache
+
+
+def test_fetch_revalidates_and_reuses_cached_body_on_304(server):
+    url = f"{server}/listing"
+
+    first = http_client.fetch(url)
+    assert first.status_code == 200
+    assert not first.not_modified
+    assert first.content == PAGE
+
+    second = http_client.fetch(url)
+    assert ListingHandler.requests_seen[-1].get("If-None-Match") == ETAG
+    assert second.status_code == 200
+    assert second.not_modified
+    assert second.content == PAGE
+
+
+def test_fetch_parsed_reuses_stored_parse_result(server):
+    url = f"{server}/listing"
+    calls = []
+
+    def parse(html):
+        calls.append(html)
+        return {"products": [html.count("card")], "last_page": False}
+
+    first = http_client.fetch_parsed(url, parse, version="v1")
+    second = http_client.fetch_parsed(url, parse, version="v1")
+
+    assert first == second == {"products": [1], "last_page": False}
+    assert len(calls) == 1
+    assert len(ListingHandler.requests_seen) == 2
+
+
+def test_fetch_parsed_parses_again_for_a_new_parser_version(server):
+    url = f"{server}/listing"
+    calls = []
+
+    def parse(html):
+        calls.append(html)
+        return len(calls)
+
+    assert http_client.fetch_parsed(url, parse, version="v1") == 1
+    assert http_client.fetch_parsed(url, parse, version="v2") == 2
+    # The result stored for v2 is reused from then on.
+    assert http_client.fetch_parsed(url, parse, version="v2") == 2
+    assert len(calls) == 2
+
+
+def test_fetch_parsed_raises_for_error_status(server):
+    with pytest.raises(http_client.FetchError):
+        http_client.fetch_parsed(f"{server}/missing", lambda html: html)
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+import logging
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Full rebuilds pick up wishlist changes of users that have not asked for a recommendation.
+INDEX_REFRESH_SECONDS = int(os.getenv('INDEX_REFRESH_SECONDS', 600))
+
+class CooccurrenceIndex:
+    """Item -> users inverted index plus an item-item co-occurrence table.
+
+    cooccurrence[a][b] is the number of users whose wishlist contains both a and b.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.user_items = {}
+        self.item_users = defaultdict(set)
+        self.cooccurrence = defaultdict(Counter)
+        self.built_at = time.monotonic()
+
+    def set_user_items(self, user_id, items):
+        """Apply the difference between a user's indexed and current wishlist."""
+        items = set(items)
+        with self._lock:
+            current = set(self.user_items.get(user_id, ()))
+            removed = current - items
+            added = items - current
+            if not removed and not added:
+                return
+
+            for item in removed:
+                current.discard(item)
+                for other in current:
+                    self._decrement(item, other)
+                    self._decrement(other, item)
+                users = self.item_users.get(item)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del self.item_users[item]
+
+            for item in added:
+                for other in current:
+                    self.cooccurrence[item][other] += 1
+                    self.cooccurrence[other][item] += 1
+                current.add(item)
+                self.item_users[item].add(user_id)
+
+            if current:
+                self.user_items[user_id] = current
+            else:
+                self.user_items.pop(user_id, None)
+
+    def _decrement(self, item, other):
+        counts = self.cooccurrence.get(item)
+        if counts is None:
+            return
+        counts[other] -= 1
+        if counts[other] <= 0:
+            del counts[other]
+            if not counts:
+                del self.cooccurrence[item]
+
+    def recommend(self, items, count=1):
+        """Return up to `count` (unique_id, score) pairs not already in `items`."""
+        items = set(items)
+        scores = Counter()
+        with self._lock:
+            for item in items:
+                for other, together in self.cooccurrence.get(item, {}).items():
+                    if other not in items:
+                        scores[other] += together
+        return scores.most_common(count)
+
+def build_index(rows):
+    """Build an index from (user_id, unique_id) wishlist rows."""
+    wishlists = defaultdict(list)
+    for row in rows:
+        wishlists[row["user_id"]].append(row["unique_id"])
+
+    index = CooccurrenceIndex()
+    for user_id, items in wishlists.items():
+        index.set_user_items(user_id, items)
+    logger.info(f"Co-occurrence index built for {len(index.user_items)} users, {len(index.item_users)} items")
+    return index
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index(load_rows):
+    """Return the process-wide index, rebuilding it from load_rows() when it is too old."""
+    global _index
+    if _index is not None and time.monotonic() - _index.built_at < INDEX_REFRESH_SECONDS:
+        return _index
+    with _index_lock:
+        if _index is None or time.monotonic() - _index.built_at >= INDEX_REFRESH_SECONDS:
+            try:
+                _index = build_index(load_rows())
+            except Exception as e:
+                if _index is None:
+                    raise
+                # Keep serving the previous index and try again after the next interval.
+                logger.error(f"Co-occurrence index rebuild failed: {e}")
+                _index.built_at = time.monotonic()
+    return _index
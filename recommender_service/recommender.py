@@ -1,11 +1,10 @@
 import os
 import pymysql
-import json
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from collections import Counter
-from handle_credentials import get_secret
-from handle_db_connections import create_conn, execute_insert, execute_select
+from handle_credentials import get_secret, prefetch_secrets
+from handle_db_connections import DB_SECRET_NAMES, create_conn, execute_insert, execute_select
+from cf_index import get_index
 import logging
 
 app = Flask(__name__)
@@ -15,44 +14,54 @@ CORS(app)  # Enable CORS for webapp requests
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+prefetch_secrets(DB_SECRET_NAMES)
+
+# Extra popular products read on top of the user's own wishlist size for the fallback.
+FALLBACK_CANDIDATES = 10
+
+def load_wishlist_rows(connection):
+    return execute_select(connection, "SELECT user_id, unique_id FROM wishlist")
+
+def get_most_wishlisted(connection, exclude_ids):
+    # Top-N read from the maintained popularity table; the user's own items and products no store
+    # lists any more are skipped.
+    sql_query = """
+    SELECT p.unique_id, p.title, p.price, p.currency, p.store, p.image_url, p.link_to_disc,
+           p.speed, p.glide, p.turn, p.fade, pp.wishlist_count
+    FROM (
+        SELECT unique_id, wishlist_count
+        FROM product_popularity
+        WHERE wishlist_count > 0
+        ORDER BY wishlist_count DESC
+        LIMIT %s
+    ) AS pp
+    JOIN product_table p ON p.unique_id = pp.unique_id
+    WHERE p.missing_since IS NULL
+    ORDER BY pp.wishlist_count DESC, p.price ASC
+    """
+    candidates = execute_select(connection, sql_query, (len(exclude_ids) + FALLBACK_CANDIDATES,))
+    return [row for row in candidates if row["unique_id"] not in exclude_ids][:1]
+
 def get_recommendation(user_id):
+    # Errors propagate to /recommend, which answers 500, so callers can tell a failure from
+    # "nothing to recommend" (a 200 without a unique_id).
     connection = None
     try:
         connection = create_conn()
         if not connection:
-            logger.error("Failed to create database connection")
-            return {"title": "No recommendation available", "unique_id": None}
+            raise RuntimeError("Failed to create database connection")
         logger.debug(f"Querying user ID: {user_id}")
         
         # Get user's wishlist
-        sql_query = "SELECT product_history FROM users WHERE id = %s"
+        sql_query = "SELECT unique_id FROM wishlist WHERE user_id = %s"
         user_data = execute_select(connection, sql_query, (user_id,))
-        logger.debug(f"Raw user_data: {user_data}")
-        user_wishlist = json.loads(user_data[0].get("product_history"))["product_history"] if user_data else []
+        user_wishlist = [row["unique_id"] for row in user_data]
         logger.debug(f"User wishlist: {user_wishlist}")
-
-        # Ensure user_wishlist is a list of strings (unique_ids)
-        if not isinstance(user_wishlist, list):
-            logger.warning(f"User wishlist is not a list: {user_wishlist}")
-            user_wishlist = []
         user_wishlist_set = set(user_wishlist)  # For faster lookups
-        logger.debug(f"User wishlist set: {user_wishlist_set}")
 
         if not user_wishlist:
             logger.info("Wishlist empty, using fallback...")
-            sql_query = """
-            SELECT p.unique_id, p.title, p.price, p.currency, p.store, p.image_url, p.link_to_disc, 
-                   p.speed, p.glide, p.turn, p.fade, COUNT(*) as wishlist_count
-            FROM users u, JSON_TABLE(u.product_history, '$.product_history[*]' COLUMNS (unique_id VARCHAR(255) PATH '$')) AS jt
-            JOIN product_table p ON p.unique_id = jt.unique_id
-            WHERE p.unique_id NOT IN (%s)
-            GROUP BY p.unique_id, p.title, p.price, p.currency, p.store, p.image_url, p.link_to_disc, 
-                     p.speed, p.glide, p.turn, p.fade
-            ORDER BY wishlist_count DESC, p.price ASC
-            LIMIT 1
-            """
-            placeholders = ','.join(['%s'] * len(user_wishlist)) or "'__DUMMY__'"  # Avoid empty IN clause
-            top_disc = execute_select(connection, sql_query, tuple(user_wishlist) if user_wishlist else ('__DUMMY__',))
+            top_disc = get_most_wishlisted(connection, user_wishlist_set)
             logger.debug(f"Fallback query result (wishlist empty): {top_disc}")
             if top_disc:
                 result = dict(top_disc[0])
@@ -61,40 +70,17 @@ def get_recommendation(user_id):
             logger.warning("No fallback recommendation found")
             return {"title": "No recommendations yet", "unique_id": None}
 
-        # Get other users' wishlists
-        sql_query = "SELECT id, product_history FROM users WHERE id != %s"
-        all_users = execute_select(connection, sql_query, (user_id,))
-        logger.debug(f"Other users count: {len(all_users)}, data: {all_users}")
-
-        similar_users_items = []
-        for user in all_users:
-            wishlist = json.loads(user["product_history"])["product_history"]
-            if not isinstance(wishlist, list):
-                logger.warning(f"Invalid wishlist for user {user['id']}: {wishlist}")
-                continue
-            if any(item in user_wishlist_set for item in wishlist):
-                similar_users_items.extend(wishlist)
-        logger.debug(f"Similar users' items: {similar_users_items}")
-
-        # Filter out items already in user's wishlist
-        recommendations = [item for item in similar_users_items if item not in user_wishlist_set]
-        logger.debug(f"Possible recommendations after filtering: {recommendations}")
+        # Score candidates from the co-occurrence index instead of scanning every other wishlist.
+        # A rebuild reads through this request's connection: requests waiting on the rebuild each
+        # hold one, so checking out another could exhaust the pool.
+        index = get_index(lambda: load_wishlist_rows(connection))
+        index.set_user_items(user_id, user_wishlist)
+        recommendations = index.recommend(user_wishlist_set)
+        logger.debug(f"Possible recommendations: {recommendations}")
 
         if not recommendations:
             logger.info("No recommendations found, using fallback...")
-            sql_query = """
-            SELECT p.unique_id, p.title, p.price, p.currency, p.store, p.image_url, p.link_to_disc, 
-                   p.speed, p.glide, p.turn, p.fade, COUNT(*) as wishlist_count
-            FROM users u, JSON_TABLE(u.product_history, '$.product_history[*]' COLUMNS (unique_id VARCHAR(255) PATH '$')) AS jt
-            JOIN product_table p ON p.unique_id = jt.unique_id
-            WHERE p.unique_id NOT IN (%s)
-            GROUP BY p.unique_id, p.title, p.price, p.currency, p.store, p.image_url, p.link_to_disc, 
-                     p.speed, p.glide, p.turn, p.fade
-            ORDER BY wishlist_count DESC, p.price ASC
-            LIMIT 1
-            """
-            placeholders = ','.join(['%s'] * len(user_wishlist)) or "'__DUMMY__'"
-            top_disc = execute_select(connection, sql_query, tuple(user_wishlist))
+            top_disc = get_most_wishlisted(connection, user_wishlist_set)
             logger.debug(f"Fallback query result: {top_disc}")
             if top_disc:
                 result = dict(top_disc[0])
@@ -107,7 +93,7 @@ def get_recommendation(user_id):
             logger.warning("No fallback recommendation found")
             return {"title": "No new recommendations", "unique_id": None}
 
-        most_common_id = Counter(recommendations).most_common(1)[0][0]
+        most_common_id = recommendations[0][0]
         logger.debug(f"Most common ID: {most_common_id}")
 
         # Double-check the recommended item isn't in the wishlist
@@ -119,7 +105,7 @@ def get_recommendation(user_id):
         SELECT unique_id, title, price, currency, store, image_url, link_to_disc, 
                speed, glide, turn, fade 
         FROM product_table 
-        WHERE unique_id = %s
+        WHERE unique_id = %s AND missing_since IS NULL
         """
         recommended_product = execute_select(connection, sql_query, (most_common_id,))
         logger.debug(f"Recommended product query result: {recommended_product}")
@@ -129,9 +115,6 @@ def get_recommendation(user_id):
             return result
         logger.warning("No product found for most common ID")
         return {"title": "No new recommendations", "unique_id": None}
-    except Exception as e:
-        logger.error(f"Recommendation error: {e}", exc_info=True)
-        return {"title": "No recommendation available", "unique_id": None}
     finally:
         if connection:
             try: